@@ -0,0 +1,142 @@
+import mmap
+import os
+import struct
+import time
+from checkers import initialize_board, get_all_valid_moves, make_move_with_multiple_captures, search_root
+from hashing import board_hash
+
+# File layout: 16-byte header, then fixed 16-byte records sorted by position hash
+#   header: magic, version, board size, record count
+#   record: hash (u64), move (4 x u8), score * 100 (i16), search depth (u8), padding
+MAGIC = b'CKBK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI4x')
+RECORD = struct.Struct('<Q4BhBx')
+
+BOOK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'books')
+
+def book_path(n, directory=BOOK_DIR):
+    return os.path.join(directory, f'book_{n}.bin')
+
+def opening_positions(n, plies):
+    """All positions reachable from the start in fewer than `plies` moves, as (board, player)."""
+    seen = set()
+    frontier = [(initialize_board(n), 'W')]
+    positions = []
+    for _ in range(plies):
+        next_frontier = []
+        for board, player in frontier:
+            h = board_hash(board, player)
+            if h in seen:
+                continue
+            seen.add(h)
+            positions.append((board, player))
+            opponent = 'B' if player == 'W' else 'W'
+            for move in get_all_valid_moves(board, player):
+                new_board = [row[:] for row in board]
+                make_move_with_multiple_captures(new_board, move, player)
+                next_frontier.append((new_board, opponent))
+        frontier = next_frontier
+    return positions
+
+def _analyse(args):
+    board, player, depth = args
+    move, score = search_root(board, player, depth)
+    return board_hash(board, player), move, score
+
+def build_book(n, plies=4, depth=6, workers=None, path=None):
+    positions = opening_positions(n, plies)
+    jobs = [(board, player, depth) for board, player in positions]
+    if workers == 1:
+        results = [_analyse(job) for job in jobs]
+    else:
+        from multiprocessing import Pool
+        with Pool(workers) as pool:
+            results = pool.map(_analyse, jobs, chunksize=8)
+
+    records = sorted((h, move, score) for h, move, score in results if move is not None)
+    path = path or book_path(n)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n, len(records)))
+        for h, move, score in records:
+            score = max(-32768, min(32767, int(round(score * 100))))
+            f.write(RECORD.pack(h, *move, score, depth))
+    return path, len(records)
+
+class OpeningBook:
+    """Read-only book file, memory-mapped and probed by binary search on the position hash."""
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+        if HEADER.size + self.count * RECORD.size > len(self.data):
+            raise ValueError(f"{path} is truncated")
+        self.hits = 0
+        self.misses = 0
+
+    def _find(self, h):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_hash = struct.unpack_from('<Q', self.data, HEADER.size + mid * RECORD.size)[0]
+            if mid_hash < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            record = RECORD.unpack_from(self.data, HEADER.size + lo * RECORD.size)
+            if record[0] == h:
+                return record
+        return None
+
+    def probe(self, board, player):
+        """Returns (move, score) for a book position, or None."""
+        if len(board) != self.n:
+            return None
+        record = self._find(board_hash(board, player))
+        if record is None:
+            self.misses += 1
+            return None
+        move = tuple(record[1:5])
+        # Guard against hash collisions
+        if move not in get_all_valid_moves(board, player):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return move, record[5] / 100
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+_books = {}
+
+def load_book(n, directory=BOOK_DIR):
+    """Opening book for board size n, or None when no book was built for that size."""
+    path = book_path(n, directory)
+    if path not in _books:
+        try:
+            _books[path] = OpeningBook(path)
+        except (OSError, ValueError):
+            _books[path] = None
+    return _books[path]
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Build opening books")
+    parser.add_argument('sizes', type=int, nargs='+', help="board sizes")
+    parser.add_argument('--plies', type=int, default=4, help="book depth in moves from the start")
+    parser.add_argument('--depth', type=int, default=6, help="minmax depth used to pick each book move")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dir', default=BOOK_DIR)
+    args = parser.parse_args()
+    for n in args.sizes:
+        start = time.time()
+        path, count = build_book(n, args.plies, args.depth, args.workers, book_path(n, args.dir))
+        print(f"{path}: {count} positions in {time.time() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import sys
+import threading
+from collections import OrderedDict
+from hashing import board_hash
+
+# Rough per-entry cost of an OrderedDict slot (links + hash table share) on CPython
+_ENTRY_OVERHEAD = 100
+
+class EvalCache:
+    """Thread-safe LRU cache of position scores, bounded by entry count and/or bytes."""
+    def __init__(self, max_entries=100000, max_bytes=None):
+        if max_entries is None and max_bytes is None:
+            raise ValueError("EvalCache needs max_entries or max_bytes")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+    
+    def _entry_size(self, key, value):
+        return sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key) + sys.getsizeof(value) + _ENTRY_OVERHEAD
+    
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            # Most recently used entries live at the end
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return
+            self.entries[key] = value
+            self.size_bytes += self._entry_size(key, value)
+            # Evict least recently used entries until both bounds hold
+            while (self.max_entries is not None and len(self.entries) > self.max_entries) or \
+                  (self.max_bytes is not None and self.size_bytes > self.max_bytes and len(self.entries) > 1):
+                old_key, old_value = self.entries.popitem(last=False)
+                self.size_bytes -= self._entry_size(old_key, old_value)
+                self.evictions += 1
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size_bytes = 0
+    
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hit_rate(),
+            }
+    
+    def __len__(self):
+        return len(self.entries)
+
+class CachedEvaluator:
+    """Wraps any evaluate(board, player) function so its results are looked up in an EvalCache first."""
+    def __init__(self, evaluate, cache=None):
+        self.evaluate = evaluate
+        self.cache = cache if cache is not None else EvalCache()
+        if hasattr(evaluate, 'batch'):
+            self.batch = self._batch
+    
+    def __call__(self, board, player):
+        key = (board_hash(board, player), player)
+        value = self.cache.get(key)
+        if value is None:
+            value = self.evaluate(board, player)
+            self.cache.put(key, value)
+        return value
+    
+    def _batch(self, boards, player):
+        # Only the boards that miss the cache are sent to the underlying batch call
+        keys = [(board_hash(board, player), player) for board in boards]
+        scores = [self.cache.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            fresh = self.evaluate.batch([boards[i] for i in missing], player)
+            for i, score in zip(missing, fresh):
+                score = float(score)
+                scores[i] = score
+                self.cache.put(keys[i], score)
+        return scores
+
+def cached(evaluate, max_entries=100000, max_bytes=None):
+    return CachedEvaluator(evaluate, EvalCache(max_entries, max_bytes))
@@ -1,7 +1,38 @@
 import copy
+import json
 import math
+import os
 import random
 
+WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weights.json')
+
+MAN_VALUE = 2
+KING_VALUE = 5
+
+def load_eval_weights(n, path=WEIGHTS_PATH):
+    # Evaluation weights tuned by tuning.py for n x n boards, or None when the weights file has none for n
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        # Format 1 files hold the weights of a single board size
+        sizes = data['sizes'] if 'sizes' in data else {str(data['board_size']): data}
+        return {name: float(value) for name, value in sizes[str(n)]['weights'].items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+_tuned_evaluators = {}  # board size -> evaluator with the tuned weights, None when there are none
+
+def tuned_evaluator(n):
+    if n not in _tuned_evaluators:
+        weights = load_eval_weights(n)
+        if weights is None:
+            _tuned_evaluators[n] = None
+        else:
+            # The weights were fitted together with the positional terms, so material alone is not the tuned model
+            from evaluation import PSTEvaluator
+            _tuned_evaluators[n] = PSTEvaluator(weights)
+    return _tuned_evaluators[n]
+
 def initialize_board(n):
     board = [[' ' for _ in range(n)] for _ in range(n)]
     for row in range(n):
@@ -324,11 +355,13 @@ def apply_move(board, move, player):
 def can_capture_again(board, player, row, col):
     return check_for_captures(board, player, row, col)
 
-def make_move_with_multiple_captures(board, start_move, player):
+def make_move_with_multiple_captures(board, start_move, player, on_step=None):
     sr, sc, er, ec = start_move
     moves_made = [start_move]
     
     # Wykonaj pierwszy ruch
+    if on_step:
+        on_step(board, start_move)
     is_capture = apply_move(board, start_move, player)
     
     # Tylko jeśli był to ruch z biciem, sprawdź możliwość kolejnych bić
@@ -347,6 +380,8 @@ def make_move_with_multiple_captures(board, start_move, player):
                 
             next_move = capture_moves[0]
             sr, sc, er, ec = next_move
+            if on_step:
+                on_step(board, next_move)
             apply_move(board, next_move, player)
             moves_made.append(next_move)
             current_row, current_col = er, ec
@@ -354,33 +389,100 @@ def make_move_with_multiple_captures(board, start_move, player):
     return moves_made
 
 def evaluate_board(board, player):
+    tuned = tuned_evaluator(len(board))
+    if tuned is not None:
+        return tuned(board, player)
     score = 0
     opponent = 'B' if player == 'W' else 'W'
     for row in board:
         for piece in row:
             if piece == player:
-                score += 2
+                score += MAN_VALUE
             elif piece == player + 'K':
-                score += 5
+                score += KING_VALUE
             elif piece == opponent:
-                score -= 2
+                score -= MAN_VALUE
             elif piece == opponent + 'K':
-                score -= 5
+                score -= KING_VALUE
     return score
 
-def minmax(board, depth, alpha, beta, maximizing_player, player):
+def search_child(board, move, player, depth, alpha, beta, maximizing_player, evaluate=evaluate_board, tablebase=None,
+                 history=None, pv=None):
+    # Plays move on board (a copy) and searches the resulting position
+    opponent = 'B' if player == 'W' else 'W'
+    if pv is not None:
+        # An early return (a draw) must not leave an earlier line behind
+        pv.clear()
+    if history is None:
+        make_move_with_multiple_captures(board, move, player)
+        return minmax(board, depth, alpha, beta, maximizing_player, opponent, evaluate, tablebase, None, pv)
+    history.make_move(board, move, player)
+    try:
+        # A repeated position or a used-up no-progress count is a draw - no need to search further
+        if history.is_draw(repetitions=2):
+            return 0
+        return minmax(board, depth, alpha, beta, maximizing_player, opponent, evaluate, tablebase, history, pv)
+    finally:
+        history.pop()
+
+def minmax(board, depth, alpha, beta, maximizing_player, player, evaluate=evaluate_board, tablebase=None, history=None,
+           pv=None):
+    # pv: optional list, filled with the best line found from this position (empty at a leaf)
+    if pv is not None:
+        pv.clear()
+    if tablebase is not None:
+        # Exact result for few-piece positions, from the side to move's point of view
+        score = tablebase.score(board, player)
+        if score is not None:
+            return score if maximizing_player else -score
+    
+    opponent = 'B' if player == 'W' else 'W'
+    # Scores are always from the maximizing (root) side's point of view, whatever the depth parity
+    root_player = player if maximizing_player else opponent
     if depth == 0:
-        return evaluate_board(board, player)
+        return evaluate(board, root_player)
     
     valid_moves = get_all_valid_moves(board, player)
-    opponent = 'B' if player == 'W' else 'W'
+    
+    if depth == 1 and valid_moves and hasattr(evaluate, 'batch'):
+        # Score all leaves of this node in one call; drawn and tablebase leaves get their exact score
+        scores = [None] * len(valid_moves)
+        leaves = []
+        for i, move in enumerate(valid_moves):
+            new_board = copy.deepcopy(board)
+            if history is None:
+                make_move_with_multiple_captures(new_board, move, player)
+            else:
+                history.make_move(new_board, move, player)
+                draw = history.is_draw(repetitions=2)
+                history.pop()
+                if draw:
+                    scores[i] = 0
+                    continue
+            if tablebase is not None:
+                score = tablebase.score(new_board, opponent)
+                if score is not None:
+                    scores[i] = -score if maximizing_player else score
+                    continue
+            leaves.append((i, new_board))
+        if leaves:
+            for (i, _), score in zip(leaves, evaluate.batch([leaf for _, leaf in leaves], root_player)):
+                scores[i] = float(score)
+        best = max(range(len(scores)), key=scores.__getitem__) if maximizing_player else \
+            min(range(len(scores)), key=scores.__getitem__)
+        if pv is not None:
+            pv[:] = [valid_moves[best]]
+        return float(scores[best])
     
     if maximizing_player:
         max_eval = -math.inf
         for move in valid_moves:
             new_board = copy.deepcopy(board)
-            make_move_with_multiple_captures(new_board, move, player)
-            evaluation = minmax(new_board, depth-1, alpha, beta, False, opponent)
+            child_pv = [] if pv is not None else None
+            evaluation = search_child(new_board, move, player, depth-1, alpha, beta, False, evaluate, tablebase, history,
+                                      child_pv)
+            if evaluation > max_eval and pv is not None:
+                pv[:] = [move] + child_pv
             max_eval = max(max_eval, evaluation)
             alpha = max(alpha, evaluation)
             if beta <= alpha:
@@ -390,17 +492,38 @@ def minmax(board, depth, alpha, beta, maximizing_player, player):
         min_eval = math.inf
         for move in valid_moves:
             new_board = copy.deepcopy(board)
-            make_move_with_multiple_captures(new_board, move, player)
-            evaluation = minmax(new_board, depth-1, alpha, beta, True, opponent)
+            child_pv = [] if pv is not None else None
+            evaluation = search_child(new_board, move, player, depth-1, alpha, beta, True, evaluate, tablebase, history,
+                                      child_pv)
+            if evaluation < min_eval and pv is not None:
+                pv[:] = [move] + child_pv
             min_eval = min(min_eval, evaluation)
             beta = min(beta, evaluation)
             if beta <= alpha:
                 break
         return min_eval
 
+def evaluate_game(board, original_player):
+    w_count = sum(row.count('W') + row.count('WK') for row in board)
+    b_count = sum(row.count('B') + row.count('BK') for row in board)
+    
+    if original_player == 'W':
+        return 1 if w_count > b_count else -1 if b_count > w_count else 0
+    else:
+        return 1 if b_count > w_count else -1 if w_count > b_count else 0
+
 class MCTSNode:
     def __init__(self, board, player, parent=None, move=None):
-        self.board = copy.deepcopy(board)
+        self.board = None
+        self.reset(board, player, parent, move)
+    
+    def reset(self, board, player, parent=None, move=None):
+        # Also reinitialises a recycled node (see nodepool.py), reusing its board when the size matches
+        if self.board is not None and len(self.board) == len(board):
+            for row, source in zip(self.board, board):
+                row[:] = source
+        else:
+            self.board = copy.deepcopy(board)
         self.player = player
         self.parent = parent
         self.children = []
@@ -414,86 +537,283 @@ class MCTSNode:
             return math.inf
         return (self.wins / self.visits) + exploration * math.sqrt(math.log(self.parent.visits) / self.visits)
 
-def mcts(root, iterations):
+def mcts(root, iterations, evaluate=evaluate_game, tablebase=None, history=None, nodes=None):
+    # nodes: optional NodePool (nodepool.py) that allocates the tree and keeps it within a node budget
     for _ in range(iterations):
         node = root
         while node.untried_moves == [] and node.children:
             node = max(node.children, key=lambda n: n.ucb1())
         
-        if node.untried_moves:
+        if node.untried_moves and (nodes is None or nodes.can_expand()):
             move = random.choice(node.untried_moves)
             new_board = copy.deepcopy(node.board)
             make_move_with_multiple_captures(new_board, move, node.player)
             opponent = 'B' if node.player == 'W' else 'W'
-            child = MCTSNode(new_board, opponent, node, move)
+            if nodes is None:
+                child = MCTSNode(new_board, opponent, node, move)
+            else:
+                child = nodes.new(MCTSNode, new_board, opponent, node, move)
             node.children.append(child)
             node.untried_moves.remove(move)
             node = child
         
         current_board = copy.deepcopy(node.board)
         current_player = node.player
+        result = None
+        # Draw rules bound the rollout length
+        rollout_history = history.fork(current_board, current_player) if history is not None else None
         while True:
+            if tablebase is not None:
+                # Stop the rollout as soon as the tablebase knows the outcome
+                entry = tablebase.probe(current_board, current_player)
+                if entry:
+                    result = entry[0] if current_player == root.player else -entry[0]
+                    break
             moves = get_all_valid_moves(current_board, current_player)
             if not moves:
                 break
             move = random.choice(moves)
-            make_move_with_multiple_captures(current_board, move, current_player)
+            if rollout_history is not None:
+                rollout_history.make_move(current_board, move, current_player)
+                if rollout_history.is_draw():
+                    result = 0
+                    break
+            else:
+                make_move_with_multiple_captures(current_board, move, current_player)
             current_player = 'B' if current_player == 'W' else 'W'
         
-        result = evaluate_game(current_board, root.player)
+        if result is None:
+            result = evaluate(current_board, root.player)
         while node:
             node.visits += 1
             node.wins += result
             node = node.parent
+        if nodes is not None and nodes.full() and not nodes.stalled:
+            nodes.prune(root)
     
     if not root.children:
         return None
     return max(root.children, key=lambda c: c.visits).move
 
-def evaluate_game(board, original_player):
-    w_count = sum(row.count('W') + row.count('WK') for row in board)
-    b_count = sum(row.count('B') + row.count('BK') for row in board)
+class RaveNode(MCTSNode):
+    def reset(self, board, player, parent=None, move=None):
+        super().reset(board, player, parent, move)
+        random.shuffle(self.untried_moves)
+        # All-moves-as-first statistics: move -> [wins, visits] for moves self.player made later in a playout
+        self.amaf = {}
     
-    if original_player == 'W':
-        return 1 if w_count > b_count else -1 if b_count > w_count else 0
+    def amaf_value(self, move):
+        wins, visits = self.amaf.get(move, (0, 0))
+        return wins / visits if visits else 0.0
+    
+    def rave_value(self, child, rave_k=300, exploration=0.7):
+        # Blend of the child's own result and its AMAF result; AMAF weighs less as real visits grow
+        beta = math.sqrt(rave_k / (3 * child.visits + rave_k))
+        value = (1 - beta) * (child.wins / child.visits) + beta * self.amaf_value(child.move)
+        return value + exploration * math.sqrt(math.log(self.visits) / child.visits)
+
+def mcts_rave(root, iterations, evaluate=evaluate_game, tablebase=None, history=None, rave_k=300,
+              widening=(1.0, 0.5), exploration=0.7, nodes=None):
+    """MCTS with RAVE and progressive widening; root must be a RaveNode.
+    
+    Node wins are kept from the point of view of the player who made the node's move.
+    A node may have at most widening[0] * visits ** widening[1] children; new children
+    are the untried moves with the best AMAF value.
+    """
+    coefficient, exponent = widening
+    for _ in range(iterations):
+        node = root
+        path = [root]
+        played = []  # (player, move) for the whole simulation, tree part first
+        while True:
+            allowed = max(1, math.ceil(coefficient * (node.visits + 1) ** exponent))
+            if (node.untried_moves and len(node.children) < allowed) or not node.children:
+                break
+            parent = node
+            node = max(parent.children, key=lambda c: parent.rave_value(c, rave_k, exploration))
+            played.append((parent.player, node.move))
+            path.append(node)
+        
+        if node.untried_moves and (nodes is None or nodes.can_expand()):
+            move = max(node.untried_moves, key=node.amaf_value)
+            new_board = copy.deepcopy(node.board)
+            make_move_with_multiple_captures(new_board, move, node.player)
+            opponent = 'B' if node.player == 'W' else 'W'
+            if nodes is None:
+                child = RaveNode(new_board, opponent, node, move)
+            else:
+                child = nodes.new(RaveNode, new_board, opponent, node, move)
+            node.children.append(child)
+            node.untried_moves.remove(move)
+            played.append((node.player, move))
+            node = child
+            path.append(node)
+        
+        current_board = copy.deepcopy(node.board)
+        current_player = node.player
+        result = None
+        rollout_history = history.fork(current_board, current_player) if history is not None else None
+        while True:
+            if tablebase is not None:
+                entry = tablebase.probe(current_board, current_player)
+                if entry:
+                    result = entry[0] if current_player == root.player else -entry[0]
+                    break
+            moves = get_all_valid_moves(current_board, current_player)
+            if not moves:
+                break
+            move = random.choice(moves)
+            played.append((current_player, move))
+            if rollout_history is not None:
+                rollout_history.make_move(current_board, move, current_player)
+                if rollout_history.is_draw():
+                    result = 0
+                    break
+            else:
+                make_move_with_multiple_captures(current_board, move, current_player)
+            current_player = 'B' if current_player == 'W' else 'W'
+        
+        if result is None:
+            result = evaluate(current_board, root.player)
+        for depth, node in enumerate(path):
+            node.visits += 1
+            if node.parent is not None:
+                node.wins += result if node.parent.player == root.player else -result
+            # Every later move by this node's player counts as if it had been played first
+            reward = result if node.player == root.player else -result
+            seen = set()
+            for player, move in played[depth:]:
+                if player == node.player and move not in seen:
+                    seen.add(move)
+                    stats = node.amaf.setdefault(move, [0, 0])
+                    stats[0] += reward
+                    stats[1] += 1
+        if nodes is not None and nodes.full() and not nodes.stalled:
+            nodes.prune(root)
+    
+    if not root.children:
+        return None
+    return max(root.children, key=lambda c: c.visits).move
+
+def search_root(board, player, depth, evaluate=evaluate_board, tablebase=None, history=None):
+    best_move = None
+    best_value = -math.inf
+    valid_moves = get_all_valid_moves(board, player)
+    
+    for move in valid_moves:
+        new_board = copy.deepcopy(board)
+        value = search_child(new_board, move, player, depth-1, -math.inf, math.inf, False, evaluate, tablebase, history)
+        # A lost position still has a move to play - the first one when every move scores -inf
+        if value > best_value or best_move is None:
+            best_value = value
+            best_move = move
+    return best_move, best_value
+
+def search_multipv(board, player, depth, k=3, evaluate=evaluate_board, tablebase=None, history=None):
+    """The k best root moves from one search, as [(move, score, pv), ...] best first.
+    
+    Each root move is searched with alpha set to the k-th best score so far, so moves that
+    cannot make the list are cut off early; only moves that beat the bound get an exact score.
+    """
+    lines = []
+    for move in get_all_valid_moves(board, player):
+        alpha = lines[-1][1] if len(lines) >= k else -math.inf
+        new_board = copy.deepcopy(board)
+        pv = []
+        value = search_child(new_board, move, player, depth-1, alpha, math.inf, False, evaluate, tablebase, history, pv)
+        if value > alpha or len(lines) < k:
+            lines.append((move, value, [move] + pv))
+            lines.sort(key=lambda line: line[1], reverse=True)
+            del lines[k:]
+    return lines
+
+def tree_lines(root, k=3):
+    """The k most visited root moves of a searched MCTS tree, as [(move, visit share, pv), ...].
+    
+    The pv follows the most visited child at every level.
+    """
+    total = sum(child.visits for child in root.children) or 1
+    lines = []
+    for child in sorted(root.children, key=lambda c: c.visits, reverse=True)[:k]:
+        pv = [child.move]
+        node = child
+        while node.children:
+            node = max(node.children, key=lambda c: c.visits)
+            if not node.visits:
+                break
+            pv.append(node.move)
+        lines.append((child.move, child.visits / total, pv))
+    return lines
+
+def analyse(board, player, ai_type='minmax', k=3, depth=3, iterations=1000, evaluate=evaluate_board,
+            evaluate_result=evaluate_game, tablebase=None, history=None, nodes=None):
+    """Multi-PV analysis: the top k moves with their scores (minmax) or visit shares (MCTS) and lines."""
+    if ai_type == 'minmax':
+        return search_multipv(board, player, depth, k, evaluate, tablebase, history)
+    if ai_type == 'mcts_rave':
+        root = RaveNode(board, player)
+        mcts_rave(root, iterations, evaluate_result, tablebase, history, nodes=nodes)
     else:
-        return 1 if b_count > w_count else -1 if w_count > b_count else 0
+        root = MCTSNode(board, player)
+        mcts(root, iterations, evaluate_result, tablebase, history, nodes)
+    return tree_lines(root, k)
 
-def ai_move(board, player, ai_type, depth=3, iterations=1000):
+def ai_move(board, player, ai_type, depth=3, iterations=1000, evaluate=evaluate_board, evaluate_result=evaluate_game,
+            book=None, tablebase=None, history=None, workers=1):
+    # workers > 1: minmax runs as a Lazy-SMP search in that many processes (smp.py)
+    valid_moves = get_all_valid_moves(board, player)
+    if len(valid_moves) <= 1:
+        # Forced move (or none) - nothing to search
+        return valid_moves[0] if valid_moves else None
+    
+    if book is not None:
+        # Known opening position - answer without searching
+        entry = book.probe(board, player)
+        if entry:
+            return entry[0]
+    
+    if tablebase is not None:
+        # Few pieces left - play the tablebase move
+        move = tablebase.best_move(board, player)
+        if move:
+            return move
+    
     if ai_type == 'minmax':
-        best_move = None
-        best_value = -math.inf
-        valid_moves = get_all_valid_moves(board, player)
-        opponent = 'B' if player == 'W' else 'W'
-        
-        for move in valid_moves:
-            new_board = copy.deepcopy(board)
-            make_move_with_multiple_captures(new_board, move, player)
-            value = minmax(new_board, depth-1, -math.inf, math.inf, False, opponent)
-            if value > best_value:
-                best_value = value
-                best_move = move
+        if workers > 1:
+            from smp import lazy_smp
+            best_move, best_value, stats = lazy_smp(board, player, depth, workers, evaluate, tablebase, history)
+            return best_move
+        best_move, best_value = search_root(board, player, depth, evaluate, tablebase, history)
         return best_move
     
     elif ai_type == 'mcts':
         root = MCTSNode(board, player)
-        best_move = mcts(root, iterations)
+        best_move = mcts(root, iterations, evaluate_result, tablebase, history)
         return best_move
+    
+    elif ai_type == 'mcts_rave':
+        root = RaveNode(board, player)
+        return mcts_rave(root, iterations, evaluate_result, tablebase, history)
 
 def main():
     n = int(input("Enter board size (even number >=4): "))
     while n % 2 != 0 or n < 4:
         n = int(input("Please enter an even number >=4: "))
     
-    ai_choice = input("Choose opponent type (human/minmax/mcts): ").lower()
-    while ai_choice not in ['human', 'minmax', 'mcts']:
-        ai_choice = input("Invalid choice. Enter human/minmax/mcts: ")
+    ai_choice = input("Choose opponent type (human/minmax/mcts/mcts_rave): ").lower()
+    while ai_choice not in ['human', 'minmax', 'mcts', 'mcts_rave']:
+        ai_choice = input("Invalid choice. Enter human/minmax/mcts/mcts_rave: ")
 
+    from history import PositionHistory
     board = initialize_board(n)
     current_player = 'W'
+    history = PositionHistory(board, current_player)
     
     while True:
         print_board(board)
+        if history.is_draw():
+            print("Draw by repetition or no progress.")
+            break
         valid_moves = get_all_valid_moves(board, current_player)
         if not valid_moves:
             print(f"Player {current_player} has no valid moves. Player {'B' if current_player == 'W' else 'W'} wins!")
@@ -507,9 +827,9 @@ def main():
         
         if current_player == 'B' and ai_choice != 'human':
             print("AI is thinking...")
-            move = ai_move(board, current_player, ai_choice)
+            move = ai_move(board, current_player, ai_choice, history=history)
             if move:
-                moves_sequence = make_move_with_multiple_captures(board, move, current_player)
+                moves_sequence = history.make_move(board, move, current_player)
                 print(f"AI moves: {moves_sequence}")
             else:
                 print("AI couldn't find a valid move. Game ends.")
@@ -544,7 +864,7 @@ def main():
                     print("Invalid input. Try again.")
             
             move = (sr, sc, er, ec)
-            moves_sequence = make_move_with_multiple_captures(board, move, current_player)
+            moves_sequence = history.make_move(board, move, current_player)
             if len(moves_sequence) > 1:
                 print(f"Multiple captures made: {moves_sequence}")
         
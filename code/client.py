@@ -0,0 +1,64 @@
+import socket
+from engine import board_to_text
+
+class EngineClient:
+    """Blocking client for server.py, used by Game when the engine runs on another host."""
+    def __init__(self, address, timeout=None):
+        if ':' in address:
+            host, port = address.rsplit(':', 1)
+            self.sock = socket.create_connection((host, int(port)), timeout=timeout)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(address)
+        self.file = self.sock.makefile('rw', encoding='utf-8', newline='\n')
+        self.info = []
+
+    def send(self, line):
+        self.file.write(line + '\n')
+        self.file.flush()
+
+    def read_line(self):
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("engine server closed the connection")
+        line = line.strip()
+        if line.startswith('error'):
+            raise ValueError(line[len('error '):])
+        return line
+
+    def set_position(self, board, player):
+        self.send(f"position {player} {board_to_text(board)}")
+        self.read_line()
+
+    def go(self, ai_type='minmax', depth=None, iterations=None, movetime=None):
+        command = ['go', ai_type]
+        for name, value in (('depth', depth), ('iterations', iterations), ('movetime', movetime)):
+            if value is not None:
+                command += [name, str(value)]
+        self.send(' '.join(command))
+        self.info = []
+        while True:
+            line = self.read_line()
+            if line.startswith('info'):
+                self.info.append(line)
+            elif line.startswith('bestmove'):
+                parts = line.split()[1:]
+                return None if parts == ['none'] else tuple(int(v) for v in parts)
+
+    def ai_move(self, board, player, ai_type, depth=3, iterations=1000, movetime=None):
+        self.set_position(board, player)
+        return self.go(ai_type, depth=depth, iterations=iterations, movetime=movetime)
+
+    def stats(self):
+        self.send('stats')
+        line = self.read_line()
+        return dict(item.split('=', 1) for item in line.split()[1:])
+
+    def close(self):
+        try:
+            self.send('quit')
+        except OSError:
+            pass
+        self.file.close()
+        self.sock.close()
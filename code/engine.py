@@ -0,0 +1,150 @@
+"""Headless engine API.
+
+Importing this module loads only the game rules and search (checkers.py) and the
+standard library; it never imports pygame. NumPy-backed evaluation, the worker
+pool and the server are loaded on first use of their names.
+
+    python3 engine.py bestmove --position "W w.w./..../..../.b.b" --ai minmax --depth 4
+    python3 engine.py bestmove --size 10 --multipv 3
+    python3 engine.py startup
+"""
+import importlib
+import sys
+import time
+from checkers import (initialize_board, get_all_valid_moves, is_valid_move, check_for_captures, apply_move,
+                      make_move_with_multiple_captures, evaluate_board, evaluate_game, minmax, search_root,
+                      MCTSNode, mcts, RaveNode, mcts_rave, ai_move, search_multipv, tree_lines, analyse)
+
+__all__ = [
+    'initialize_board', 'get_all_valid_moves', 'is_valid_move', 'check_for_captures', 'apply_move',
+    'make_move_with_multiple_captures', 'evaluate_board', 'evaluate_game', 'minmax', 'search_root',
+    'MCTSNode', 'mcts', 'RaveNode', 'mcts_rave', 'ai_move', 'search_multipv', 'tree_lines', 'analyse', 'best_move', 'analyse_position', 'board_to_text', 'board_from_text', 'move_to_text',
+    # Loaded on first use
+    'board_hash', 'PSTEvaluator', 'EvalCache', 'CachedEvaluator', 'NodePool', 'load_book', 'load_tablebase',
+    'EnginePool', 'EngineServer', 'EngineClient',
+]
+
+_LAZY = {
+    'board_hash': 'hashing',
+    'PSTEvaluator': 'evaluation',
+    'EvalCache': 'cache',
+    'CachedEvaluator': 'cache',
+    'NodePool': 'nodepool',
+    'load_book': 'book',
+    'load_tablebase': 'tablebase',
+    'EnginePool': 'pool',
+    'EngineServer': 'server',
+    'EngineClient': 'client',
+}
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'engine' has no attribute '{name}'")
+
+SQUARE_CHARS = {' ': '.', 'W': 'w', 'WK': 'W', 'B': 'b', 'BK': 'B'}
+CHAR_SQUARES = {char: piece for piece, char in SQUARE_CHARS.items()}
+
+def board_to_text(board):
+    return '/'.join(''.join(SQUARE_CHARS[piece] for piece in row) for row in board)
+
+def board_from_text(text):
+    rows = text.split('/')
+    if any(len(row) != len(rows) for row in rows):
+        raise ValueError("board must be square")
+    return [[CHAR_SQUARES[char] for char in row] for row in rows]
+
+def move_to_text(move):
+    return ' '.join(str(v) for v in move) if move else 'none'
+
+def best_move(board, player, ai_type='minmax', depth=4, iterations=500, evaluation='material',
+              use_book=True, use_tablebase=True, workers=1):
+    """One-call entry point: book and tablebase when available, otherwise a search."""
+    from book import load_book
+    from tablebase import load_tablebase
+    n = len(board)
+    evaluate = evaluate_board
+    if evaluation == 'pst':
+        from evaluation import PSTEvaluator
+        evaluate = PSTEvaluator()
+    book = load_book(n) if use_book else None
+    tablebase = load_tablebase(n) if use_tablebase else None
+    return ai_move(board, player, ai_type, depth=depth, iterations=iterations, evaluate=evaluate,
+                   book=book, tablebase=tablebase, workers=workers)
+
+def analyse_position(board, player, ai_type='minmax', k=3, depth=4, iterations=500, evaluation='material',
+                     use_tablebase=True):
+    """Multi-PV counterpart of best_move: [(move, score or visit share, pv), ...] for the top k moves."""
+    from tablebase import load_tablebase
+    evaluate = evaluate_board
+    if evaluation == 'pst':
+        from evaluation import PSTEvaluator
+        evaluate = PSTEvaluator()
+    tablebase = load_tablebase(len(board)) if use_tablebase else None
+    return analyse(board, player, ai_type, k, depth, iterations, evaluate, tablebase=tablebase)
+
+def measure_startup(runs=10):
+    """Median wall time in ms of starting a fresh interpreter that imports this module."""
+    import statistics
+    import subprocess
+    import os
+    here = os.path.dirname(os.path.abspath(__file__))
+    def run(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=here, check=True)
+        return (time.perf_counter() - start) * 1000
+    baseline = statistics.median(run('pass') for _ in range(runs))
+    # The check fails the run if importing the engine pulled in a heavy dependency
+    engine = statistics.median(run("import engine, sys; sys.exit(any(m in sys.modules for m in ('pygame', 'numpy')))")
+                               for _ in range(runs))
+    return baseline, engine
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Headless checkers engine")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('bestmove', help="print the engine's move for a position")
+    search.add_argument('--size', type=int, default=8, help="board size when no position is given")
+    search.add_argument('--position', help="'<W|B> <board>' in the server's board text format")
+    search.add_argument('--ai', choices=['minmax', 'mcts', 'mcts_rave'], default='minmax')
+    search.add_argument('--depth', type=int, default=4)
+    search.add_argument('--iterations', type=int, default=500)
+    search.add_argument('--eval', choices=['material', 'pst'], default='material')
+    search.add_argument('--no-book', action='store_true')
+    search.add_argument('--no-tablebase', action='store_true')
+    search.add_argument('--workers', type=int, default=1, help="processes for a Lazy-SMP minmax search")
+    search.add_argument('--multipv', type=int, default=1, help="print the top K lines instead of one move")
+
+    startup = commands.add_parser('startup', help="measure interpreter + engine import time")
+    startup.add_argument('--runs', type=int, default=10)
+
+    args = parser.parse_args(argv)
+    if args.command == 'bestmove':
+        if args.position:
+            player, text = args.position.split()
+            board = board_from_text(text)
+        else:
+            player, board = 'W', initialize_board(args.size)
+        start = time.perf_counter()
+        if args.multipv > 1:
+            lines = analyse_position(board, player, args.ai, args.multipv, args.depth, args.iterations, args.eval,
+                                     not args.no_tablebase)
+            for i, (move, score, pv) in enumerate(lines, 1):
+                print(f"info multipv {i} score {round(score, 3) or 0:g} pv {' '.join(move_to_text(m) for m in pv)}")
+            print(f"bestmove {move_to_text(lines[0][0] if lines else None)}")
+            print(f"time {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+            return
+        move = best_move(board, player, args.ai, args.depth, args.iterations, args.eval,
+                         not args.no_book, not args.no_tablebase, args.workers)
+        print(f"bestmove {move_to_text(move)}")
+        print(f"time {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    else:
+        baseline, engine = measure_startup(args.runs)
+        print(f"python -c pass:            {baseline:.1f} ms")
+        print(f"python -c 'import engine': {engine:.1f} ms (+{engine - baseline:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
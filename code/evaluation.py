@@ -0,0 +1,158 @@
+import numpy as np
+from checkers import load_eval_weights
+
+# Square codes used in the array form of the board
+EMPTY, WHITE_MAN, WHITE_KING, BLACK_MAN, BLACK_KING = 0, 1, 2, 3, 4
+PIECE_CODES = {' ': EMPTY, 'W': WHITE_MAN, 'WK': WHITE_KING, 'B': BLACK_MAN, 'BK': BLACK_KING}
+
+# Default weights - material keeps the 2/5 scale of evaluate_board
+DEFAULT_WEIGHTS = {
+    'man': 2.0,
+    'king': 5.0,
+    'advancement': 0.5,  # bonus for a man on the promotion row, scaled down towards its own back rank
+    'centre': 0.3,       # bonus for a piece in the middle of the board
+    'back_rank': 0.4,    # bonus for a man still guarding its own back rank
+    'mobility': 0.05,    # per piece with at least one free diagonal step
+}
+FEATURES = list(DEFAULT_WEIGHTS)
+
+_tables = {}
+_tuned = {}
+
+def weights_for(n, weights=None):
+    """Weights for n x n boards: the defaults, replaced by the ones tuned for n (see tuning.py), then by `weights`."""
+    if n not in _tuned:
+        _tuned[n] = {name: value for name, value in (load_eval_weights(n) or {}).items() if name in FEATURES}
+    return {**DEFAULT_WEIGHTS, **_tuned[n], **(weights or {})}
+
+def board_to_array(board):
+    return np.array([[PIECE_CODES[piece] for piece in row] for row in board], dtype=np.int8)
+
+def boards_to_array(boards):
+    return np.stack([board_to_array(board) for board in boards])
+
+def unit_tables(n):
+    """Per-square tables (for White) behind the positional features: advancement, centre, back_rank."""
+    if n not in _tables:
+        rows = np.arange(n, dtype=np.float64)[:, None]
+        cols = np.arange(n, dtype=np.float64)[None, :]
+        middle = (n - 1) / 2
+        # 1.0 in the middle of the board, 0.0 in the corners
+        centre = 1 - (np.abs(rows - middle) + np.abs(cols - middle)) / (2 * middle)
+        # White men move towards row n - 1
+        advancement = np.broadcast_to(rows / (n - 1), (n, n)).copy()
+        back_rank = np.zeros((n, n))
+        back_rank[0, :] = 1
+        _tables[n] = {'advancement': advancement, 'centre': centre, 'back_rank': back_rank}
+    return _tables[n]
+
+def piece_square_tables(n, weights=None):
+    """Returns (man_table, king_table) for White; Black uses the tables flipped vertically."""
+    weights = weights_for(n, weights)
+    tables = unit_tables(n)
+    man_table = (weights['man'] + weights['advancement'] * tables['advancement']
+                 + weights['centre'] * tables['centre'] + weights['back_rank'] * tables['back_rank'])
+    king_table = weights['king'] + weights['centre'] * tables['centre']
+    return man_table, king_table
+
+def _mobile_pieces(arrays, man, king, forward):
+    # Counts pieces with at least one empty diagonal neighbour (a cheap mobility estimate)
+    empty = arrays == EMPTY
+    padded = np.pad(empty, ((0, 0), (1, 1), (1, 1)), constant_values=False)
+    n = arrays.shape[1]
+
+    def neighbour(dr, dc):
+        return padded[:, 1 + dr:1 + dr + n, 1 + dc:1 + dc + n]
+
+    forward_free = neighbour(forward, -1) | neighbour(forward, 1)
+    backward_free = neighbour(-forward, -1) | neighbour(-forward, 1)
+    mobile = ((arrays == man) & forward_free) | ((arrays == king) & (forward_free | backward_free))
+    return mobile.sum(axis=(1, 2))
+
+def feature_arrays(arrays):
+    """(batch, len(FEATURES)) matrix of White-minus-Black feature values; the score is its product with the weights."""
+    n = arrays.shape[1]
+    tables = unit_tables(n)
+    white_men, white_kings = arrays == WHITE_MAN, arrays == WHITE_KING
+    black_men, black_kings = arrays == BLACK_MAN, arrays == BLACK_KING
+    white_pieces, black_pieces = white_men | white_kings, black_men | black_kings
+
+    def table_sum(mask, table):
+        return (mask * table).sum(axis=(1, 2))
+
+    columns = {
+        'man': white_men.sum(axis=(1, 2)) - black_men.sum(axis=(1, 2)),
+        'king': white_kings.sum(axis=(1, 2)) - black_kings.sum(axis=(1, 2)),
+        'advancement': table_sum(white_men, tables['advancement']) - table_sum(black_men, tables['advancement'][::-1]),
+        'centre': table_sum(white_pieces, tables['centre']) - table_sum(black_pieces, tables['centre'][::-1]),
+        'back_rank': table_sum(white_men, tables['back_rank']) - table_sum(black_men, tables['back_rank'][::-1]),
+        'mobility': (_mobile_pieces(arrays, WHITE_MAN, WHITE_KING, 1)
+                     - _mobile_pieces(arrays, BLACK_MAN, BLACK_KING, -1)),
+    }
+    return np.stack([columns[name] for name in FEATURES], axis=1).astype(np.float64)
+
+def evaluate_arrays(arrays, player, weights=None):
+    """Scores a (batch, n, n) array of boards from player's point of view."""
+    weights = weights_for(arrays.shape[1], weights)
+    score = feature_arrays(arrays) @ np.array([weights[name] for name in FEATURES])
+    return score if player == 'W' else -score
+
+def evaluate_position(board, player, weights=None):
+    return float(evaluate_arrays(board_to_array(board)[None], player, weights)[0])
+
+def evaluate_batch(boards, player, weights=None):
+    """Scores many leaf positions (all of the same size) in one call."""
+    if not boards:
+        return np.zeros(0)
+    return evaluate_arrays(boards_to_array(boards), player, weights)
+
+class PSTEvaluator:
+    """Evaluation function usable in place of evaluate_board, with a batch entry point for minmax leaves.
+
+    Positions are scored in pure Python from per-size lookup tables (about as fast as
+    evaluate_board); building a NumPy array for one board costs far more than the evaluation.
+    """
+    def __init__(self, weights=None):
+        self.weights = weights  # on top of weights_for(n) for each board size
+        self._square_tables = {}
+
+    def _squares(self, n):
+        # For each dark square: piece -> (table value, diagonal neighbours it can step to, mobility weight)
+        if n not in self._square_tables:
+            man, king = piece_square_tables(n, self.weights)
+            mobility = weights_for(n, self.weights)['mobility']
+            squares = []
+            for r in range(n):
+                for c in range(r % 2, n, 2):
+                    def steps(drs):
+                        return tuple((r + dr, c + dc) for dr in drs for dc in (-1, 1)
+                                     if 0 <= r + dr < n and 0 <= c + dc < n)
+                    squares.append((r, c, {
+                        'W': (man[r, c], steps((1,)), mobility),
+                        'WK': (king[r, c], steps((1, -1)), mobility),
+                        'B': (-man[n - 1 - r, c], steps((-1,)), -mobility),
+                        'BK': (-king[n - 1 - r, c], steps((1, -1)), -mobility),
+                    }))
+            self._square_tables[n] = [(r, c, {piece: (float(value), steps, float(weight))
+                                      for piece, (value, steps, weight) in entries.items()})
+                              for r, c, entries in squares]
+        return self._square_tables[n]
+
+    def __call__(self, board, player):
+        score = 0.0
+        for r, c, entries in self._squares(len(board)):
+            piece = board[r][c]
+            if piece != ' ':
+                value, steps, mobility = entries[piece]
+                score += value
+                # Same estimate as _mobile_pieces: at least one free diagonal step
+                for nr, nc in steps:
+                    if board[nr][nc] == ' ':
+                        score += mobility
+                        break
+        return score if player == 'W' else -score
+
+    def batch(self, boards, player):
+        # Converting Python boards to arrays costs more than the lookups, so small batches stay scalar;
+        # evaluate_arrays is the fast path for data that is already in array form
+        return np.array([self(board, player) for board in boards])
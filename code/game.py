@@ -2,13 +2,21 @@ import time
 import copy
 from checkers import *
 from gui import *
+from evaluation import PSTEvaluator
+from cache import EvalCache, CachedEvaluator
+from book import load_book
+from tablebase import load_tablebase, WIN, LOSS
+from timeman import TimeManager, timed_move, remote_timed_move
+from history import PositionHistory, is_progress
+from profiling import LatencyHistogram, profile_call
 
 class Game:
-    def __init__(self, n, opponent_type):
+    def __init__(self, n, opponent_type, engine=None, clock=None):
         self.n = n
         self.board = initialize_board(n)
         self.current_player = 'W'
         self.opponent_type = opponent_type
+        self.engine = engine  # EngineClient for a remote engine server, None to search in-process
         self.selected_piece = None
         self.valid_moves = []
         self.mandatory_captures = False
@@ -17,6 +25,15 @@ class Game:
         self.ai_thinking = False
         self.animations = []
         self.pause_until = 0  # Time until the pause ends
+        self.eval_cache = EvalCache(max_entries=200000)
+        self.evaluator = CachedEvaluator(PSTEvaluator(), self.eval_cache)
+        self.book = load_book(n)  # None when no book was built for this size
+        self.tablebase = load_tablebase(n)
+        # (total seconds, increment) for the AI's game clock; None searches to a fixed depth
+        self.time_manager = TimeManager(*clock) if clock else None
+        self.history = PositionHistory(self.board, self.current_player)
+        self.ai_latency = LatencyHistogram()
+        self.profile_next_move = None  # 'sample' or 'cprofile' to profile the next AI move
         
         # Pre-calculate piece positions
         self.piece_centers = {}
@@ -117,6 +134,7 @@ class Game:
                 # Finished entire move sequence
                 self.pause_until = time.time() + PAUSE_AFTER_MOVE
                 self.current_player = 'B' if self.current_player == 'W' else 'W'
+                self.history.record(self.board, self.current_player, self.pending_progress)
                 self.check_game_over()
                 delattr(self, 'pending_moves')
                 delattr(self, 'move_index')
@@ -124,7 +142,7 @@ class Game:
             # Apply single move for player (not AI)
             elif hasattr(self, 'pending_move'):
                 move, player = self.pending_move
-                make_move_with_multiple_captures(self.board, move, player)
+                self.history.make_move(self.board, move, player)
                 self.pause_until = time.time() + PAUSE_AFTER_MOVE
                 self.current_player = 'B' if player == 'W' else 'W'
                 self.check_game_over()
@@ -149,10 +167,47 @@ class Game:
             self.game_over = True
             self.winner = 'W'
         
+        # Threefold repetition or too long without progress
+        if not self.game_over and self.history.is_draw():
+            self.game_over = True
+            self.winner = None
+        
+        # Few pieces left - the tablebase already knows the result
+        if not self.game_over and self.tablebase is not None:
+            entry = self.tablebase.probe(self.board, self.current_player)
+            if entry:
+                result, plies = entry
+                opponent = 'B' if self.current_player == 'W' else 'W'
+                self.game_over = True
+                self.winner = self.current_player if result == WIN else opponent if result == LOSS else None
+        
+    def search_move(self):
+        if self.engine and self.time_manager:
+            # The game clock still applies - the remote engine gets each move's budget as its movetime
+            return remote_timed_move(self.engine, self.board, self.current_player, self.opponent_type,
+                                     self.time_manager)
+        if self.time_manager:
+            return timed_move(self.board, self.current_player, self.opponent_type, self.time_manager,
+                              evaluate=self.evaluator, book=self.book, tablebase=self.tablebase,
+                              history=self.history)
+        if self.engine:
+            return self.engine.ai_move(self.board, self.current_player, self.opponent_type, depth=4, iterations=500)
+        return ai_move(self.board, self.current_player, self.opponent_type, depth=4, iterations=500,
+                       evaluate=self.evaluator, book=self.book,
+                       tablebase=self.tablebase, history=self.history)
+    
     def ai_move(self):
         if self.current_player == 'B' and self.opponent_type != 'human' and not self.game_over and not self.animations and time.time() >= self.pause_until:
             self.ai_thinking = True
-            move = ai_move(self.board, self.current_player, self.opponent_type, depth=4, iterations=500)
+            start = time.perf_counter()
+            if self.profile_next_move:
+                move, paths = profile_call(self.search_move, name=f"ai_move_{self.opponent_type}",
+                                           mode=self.profile_next_move)
+                self.profile_next_move = None
+                print(f"AI move profile written to {', '.join(paths)}")
+            else:
+                move = self.search_move()
+            self.ai_latency.add(time.perf_counter() - start)
             self.ai_thinking = False
             
             if move:
@@ -162,6 +217,7 @@ class Game:
                 # Create temporary board copy to determine move sequence
                 temp_board = copy.deepcopy(self.board)
                 moves_sequence = make_move_with_multiple_captures(temp_board, move, self.current_player)
+                self.pending_progress = is_progress(self.board, move) or len(moves_sequence) > 1
                 
                 # Animate only first move - rest will be handled after it ends
                 first_move = moves_sequence[0]
@@ -1,6 +1,5 @@
 import pygame
 from pygame.locals import *
-from heckers import *
 import time
 
 # Colors
@@ -22,6 +21,7 @@ MARGIN = 5
 BUTTON_WIDTH = 120
 BUTTON_HEIGHT = 40
 FPS = 60
+IDLE_FPS = 10  # frame rate while nothing is moving
 ANIMATION_SPEED = 0.3  # seconds for one animation
 PAUSE_AFTER_MOVE = 1.0  # seconds
 
@@ -100,71 +100,132 @@ class AnimatedPiece:
         y = self.start_pos[1] + (self.end_pos[1] - self.start_pos[1]) * progress
         return (x, y)
 
-def draw_board(screen, game):
+# Cached surfaces - the board background per size and one sprite per piece type
+_board_surfaces = {}
+_piece_sprites = {}
+
+def get_board_surface(n):
+    if n not in _board_surfaces:
+        surface = pygame.Surface((CELL_SIZE * n, CELL_SIZE * n))
+        for row in range(n):
+            for col in range(n):
+                color = COLORS['board_light'] if (row + col) % 2 == 0 else COLORS['board_dark']
+                pygame.draw.rect(surface, color, (col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+        _board_surfaces[n] = surface.convert() if pygame.display.get_surface() else surface
+    return _board_surfaces[n]
+
+def get_piece_sprite(piece_type):
+    if piece_type not in _piece_sprites:
+        sprite = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+        center = (CELL_SIZE // 2, CELL_SIZE // 2)
+        color = COLORS['white_piece'] if piece_type in ['W', 'WK'] else COLORS['black_piece']
+        pygame.draw.circle(sprite, color, center, CELL_SIZE//3)
+        
+        # Draw crown for kings
+        if 'K' in piece_type:
+            crown_color = (255, 215, 0)
+            pygame.draw.circle(sprite, crown_color, center, 8)
+            pygame.draw.line(sprite, crown_color,
+                           (center[0] - 10, center[1]),
+                           (center[0] + 10, center[1]), 3)
+            pygame.draw.line(sprite, crown_color,
+                           (center[0] - 5, center[1] - 5),
+                           (center[0] + 5, center[1] - 5), 3)
+        _piece_sprites[piece_type] = sprite
+    return _piece_sprites[piece_type]
+
+def sprite_rect(pos):
+    return pygame.Rect(int(pos[0]) - CELL_SIZE // 2, int(pos[1]) - CELL_SIZE // 2, CELL_SIZE, CELL_SIZE)
+
+def get_animated_positions(game):
+    # Squares whose pieces are drawn by an animation instead of from the board
+    if not game.animations:
+        return []
+    if hasattr(game, 'pending_move'):
+        sr, sc, er, ec = game.pending_move[0]
+    elif hasattr(game, 'pending_moves'):
+        sr, sc, er, ec = game.pending_moves[game.move_index]
+    else:
+        return []
+    animated_positions = [(sr, sc)]
+    # For captures, exclude the captured piece
+    if abs(er - sr) == 2 and abs(ec - sc) == 2:
+        animated_positions.append(((sr + er) // 2, (sc + ec) // 2))
+    return animated_positions
+
+def draw_static(surface, game, offset=(0, 0)):
+    # Board, highlights and every piece that is not being animated
     n = game.n
-    # Draw board squares
-    for row in range(n):
-        for col in range(n):
-            x = MARGIN + col * CELL_SIZE
-            y = MARGIN + row * CELL_SIZE
-            color = COLORS['board_light'] if (row + col) % 2 == 0 else COLORS['board_dark']
-            pygame.draw.rect(screen, color, (x, y, CELL_SIZE, CELL_SIZE))
-            
+    ox, oy = offset
+    surface.blit(get_board_surface(n), (MARGIN + ox, MARGIN + oy))
+    
     # Draw highlights
     if game.selected_piece:
         row, col = game.selected_piece
-        x = MARGIN + col * CELL_SIZE
-        y = MARGIN + row * CELL_SIZE
-        pygame.draw.rect(screen, COLORS['highlight'], (x, y, CELL_SIZE, CELL_SIZE), 3)
+        x = MARGIN + col * CELL_SIZE + ox
+        y = MARGIN + row * CELL_SIZE + oy
+        pygame.draw.rect(surface, COLORS['highlight'], (x, y, CELL_SIZE, CELL_SIZE), 3)
         
         for (er, ec) in game.valid_moves:
-            x = MARGIN + ec * CELL_SIZE
-            y = MARGIN + er * CELL_SIZE
-            pygame.draw.circle(screen, COLORS['highlight'], 
+            x = MARGIN + ec * CELL_SIZE + ox
+            y = MARGIN + er * CELL_SIZE + oy
+            pygame.draw.circle(surface, COLORS['highlight'], 
                               (x + CELL_SIZE//2, y + CELL_SIZE//2), CELL_SIZE//4)
     
-    # Create a mapping of what pieces to draw where
-    pieces_to_draw = {}
-    
-    # Add all static pieces from the board (excluding pieces that are being animated)
-    animated_positions = []
-    for anim in game.animations:
-        if hasattr(game, 'pending_move'):
-            sr, sc, er, ec = game.pending_move[0]
-            animated_positions.append((sr, sc))
-            # For captures, exclude the captured piece
-            if abs(er - sr) == 2 and abs(ec - sc) == 2:
-                captured_row = (sr + er) // 2
-                captured_col = (sc + ec) // 2
-                animated_positions.append((captured_row, captured_col))
-    
-    # Draw static pieces
+    animated_positions = get_animated_positions(game)
     for row in range(n):
         for col in range(n):
-            if (row, col) not in animated_positions:
-                piece = game.board[row][col]
-                if piece != ' ':
-                    pieces_to_draw[(game.piece_centers[(row, col)])] = piece
-    
-    # Add animated pieces
+            piece = game.board[row][col]
+            if piece != ' ' and (row, col) not in animated_positions:
+                x = MARGIN + col * CELL_SIZE + ox
+                y = MARGIN + row * CELL_SIZE + oy
+                surface.blit(get_piece_sprite(piece), (x, y))
+
+def draw_animations(surface, game):
+    rects = []
     for anim in game.animations:
         if not anim.is_finished:
-            current_pos = anim.get_current_position()
-            pieces_to_draw[current_pos] = anim.piece_type
+            rect = sprite_rect(anim.get_current_position())
+            surface.blit(get_piece_sprite(anim.piece_type), rect)
+            rects.append(rect)
+    return rects
+
+def draw_board(screen, game):
+    draw_static(screen, game)
+    draw_animations(screen, game)
+
+class BoardRenderer:
+    """Keeps a pre-rendered static layer and reports only the screen areas that changed."""
+    def __init__(self, n):
+        self.n = n
+        self.board_rect = pygame.Rect(MARGIN, MARGIN, CELL_SIZE * n, CELL_SIZE * n)
+        self.static_layer = pygame.Surface(self.board_rect.size)
+        self.static_key = None
+        self.anim_rects = []
     
-    # Draw all pieces
-    for pos, piece_type in pieces_to_draw.items():
-        # Draw piece
-        color = COLORS['white_piece'] if piece_type in ['W', 'WK'] else COLORS['black_piece']
-        pygame.draw.circle(screen, color, pos, CELL_SIZE//3)
+    def invalidate(self):
+        self.static_key = None
+    
+    def draw(self, screen, game):
+        key = (tuple(tuple(row) for row in game.board), game.selected_piece,
+               tuple(game.valid_moves), tuple(get_animated_positions(game)))
+        if key != self.static_key:
+            # Board state or highlights changed - rebuild the static layer once
+            draw_static(self.static_layer, game, (-MARGIN, -MARGIN))
+            self.static_key = key
+            screen.blit(self.static_layer, self.board_rect)
+            self.anim_rects = draw_animations(screen, game)
+            return [self.board_rect]
         
-        # Draw crown for kings
-        if 'K' in piece_type:
-            crown_color = (255, 215, 0)
-            pygame.draw.circle(screen, crown_color, pos, 8)
-            pygame.draw.line(screen, crown_color, 
-                           (pos[0] - 10, pos[1]),
-                           (pos[0] + 10, pos[1]), 3)
-            pygame.draw.line(screen, crown_color, 
-                           (pos[0] - 5, pos[1] - 5),
-                           (pos[0] + 5, pos[1] - 5), 3)
\ No newline at end of file
+        if not self.anim_rects and not game.animations:
+            return []
+        
+        # Restore the areas covered by last frame's animations, then draw them in their new place
+        dirty = list(self.anim_rects)
+        for rect in self.anim_rects:
+            screen.fill(COLORS['background'], rect)
+            board_part = rect.clip(self.board_rect)
+            screen.blit(self.static_layer, board_part, board_part.move(-MARGIN, -MARGIN))
+        self.anim_rects = draw_animations(screen, game)
+        dirty.extend(self.anim_rects)
+        return dirty
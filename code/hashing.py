@@ -0,0 +1,35 @@
+import random
+
+PIECE_TYPES = ['W', 'WK', 'B', 'BK']
+
+# Zobrist keys per board size. Seeded so hashes are identical across processes and runs.
+_keys = {}
+
+def zobrist_keys(n):
+    if n not in _keys:
+        rng = random.Random(0x5EED0000 + n)
+        squares = [[{piece: rng.getrandbits(64) for piece in PIECE_TYPES} for _ in range(n)] for _ in range(n)]
+        side = rng.getrandbits(64)
+        _keys[n] = (squares, side)
+    return _keys[n]
+
+def board_hash(board, player):
+    """64-bit hash of the position; player is the side to move."""
+    squares, side = zobrist_keys(len(board))
+    h = 0
+    for r, row in enumerate(board):
+        for c, piece in enumerate(row):
+            if piece != ' ':
+                h ^= squares[r][c][piece]
+    if player == 'B':
+        h ^= side
+    return h
+
+def toggle_piece(h, n, r, c, piece):
+    # XOR a piece in or out of a hash
+    if piece == ' ':
+        return h
+    return h ^ zobrist_keys(n)[0][r][c][piece]
+
+def toggle_side(h, n):
+    return h ^ zobrist_keys(n)[1]
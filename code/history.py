@@ -0,0 +1,86 @@
+from checkers import make_move_with_multiple_captures
+from hashing import board_hash, toggle_piece, toggle_side
+
+REPETITIONS = 3          # the same position with the same side to move this many times is a draw
+NO_PROGRESS_LIMIT = 60   # plies without a capture or a man move
+
+def move_path(move):
+    # Every square a single step passes over, both ends included
+    sr, sc, er, ec = move
+    distance = abs(er - sr)
+    dir_r = (er - sr) // distance
+    dir_c = (ec - sc) // distance
+    return [(sr + dir_r * step, sc + dir_c * step) for step in range(distance + 1)]
+
+def is_progress(board, move):
+    """True when the move moves a man or captures - the moves that reset the no-progress count."""
+    sr, sc, er, ec = move
+    piece = board[sr][sc]
+    if piece in ['W', 'B']:
+        return True
+    opponent = 'B' if piece[0] == 'W' else 'W'
+    return any(board[r][c] in [opponent, opponent + 'K'] for r, c in move_path(move)[1:-1])
+
+class PositionHistory:
+    """Hashes of the positions played so far, for repetition and no-progress draws.
+
+    make_move() updates the hash incrementally from the squares the move touched, and
+    pop() undoes the last push, so a search can walk its own line on top of the game.
+    """
+    def __init__(self, board, player, repetitions=REPETITIONS, no_progress_limit=NO_PROGRESS_LIMIT, quiet=0):
+        self.n = len(board)
+        self.repetitions = repetitions
+        self.no_progress_limit = no_progress_limit
+        self.hash = board_hash(board, player)
+        self.quiet = quiet
+        self.counts = {self.hash: 1}
+        self.stack = []
+
+    def push(self, h, progress):
+        self.stack.append((self.hash, self.quiet))
+        self.hash = h
+        self.quiet = 0 if progress else self.quiet + 1
+        self.counts[h] = self.counts.get(h, 0) + 1
+
+    def pop(self):
+        count = self.counts[self.hash] - 1
+        if count:
+            self.counts[self.hash] = count
+        else:
+            del self.counts[self.hash]
+        self.hash, self.quiet = self.stack.pop()
+
+    def record(self, board, player, progress):
+        # Push a position whose hash is computed from scratch (e.g. after an animated move)
+        self.push(board_hash(board, player), progress)
+
+    def make_move(self, board, move, player):
+        """Plays move (with any follow-up captures) on board and pushes the new position."""
+        progress = is_progress(board, move)
+        before = {}
+
+        def remember(board, step):
+            # Keep the value each square had before the first step that touches it
+            for r, c in move_path(step):
+                if (r, c) not in before:
+                    before[(r, c)] = board[r][c]
+
+        moves_sequence = make_move_with_multiple_captures(board, move, player, remember)
+        h = self.hash
+        for (r, c), old in before.items():
+            new = board[r][c]
+            if old != new:
+                h = toggle_piece(toggle_piece(h, self.n, r, c, old), self.n, r, c, new)
+        self.push(toggle_side(h, self.n), progress or len(moves_sequence) > 1)
+        return moves_sequence
+
+    def fork(self, board, player):
+        # Fresh history for a playout from board, continuing this one's no-progress count
+        return PositionHistory(board, player, self.repetitions, self.no_progress_limit, self.quiet)
+
+    def count(self):
+        return self.counts.get(self.hash, 0)
+
+    def is_draw(self, repetitions=None):
+        """Draw by repetition (default: the game's threefold rule) or by the no-progress rule."""
+        return self.count() >= (repetitions or self.repetitions) or self.quiet >= self.no_progress_limit
@@ -2,19 +2,21 @@ import pygame
 import sys
 from game import *
 from gui import *
+from profiling import FrameProfiler
 
 def setup_screen():
     pygame.init()
-    screen = pygame.display.set_mode((400, 450))
+    screen = pygame.display.set_mode((400, 500))
     pygame.display.set_caption("Checkers Setup")
     
     board_size_input = TextInput(100, 100, 200, 40, '8')
     opponent_buttons = [
         Button(100, 200, 200, 40, 'Human', 'human'),
         Button(100, 250, 200, 40, 'AI (Minimax)', 'minmax'),
-        Button(100, 300, 200, 40, 'AI (MCTS)', 'mcts')
+        Button(100, 300, 200, 40, 'AI (MCTS)', 'mcts'),
+        Button(100, 350, 200, 40, 'AI (MCTS-RAVE)', 'mcts_rave')
     ]
-    start_button = Button(100, 350, 200, 40, 'Start Game', 'start')
+    start_button = Button(100, 400, 200, 40, 'Start Game', 'start')
     
     title_font = pygame.font.Font(None, 36)
     title_text = title_font.render("Checkers Setup", True, COLORS['text'])
@@ -62,14 +64,22 @@ def setup_screen():
         pygame.display.flip()
         clock.tick(FPS)
 
-def game_loop(n, opponent_type):
+def print_perf(game, perf):
+    print(perf.report())
+    print(game.ai_latency.report(f"AI move latency ({game.opponent_type})"))
+
+def game_loop(n, opponent_type, engine=None, clock=None, show_perf=False, profile_ai=None):
     pygame.init()
     WINDOW_WIDTH = CELL_SIZE * n + 2 * MARGIN + 200
     WINDOW_HEIGHT = CELL_SIZE * n + 2 * MARGIN
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("Checkers")
     
-    game = Game(n, opponent_type)
+    game = Game(n, opponent_type, engine, clock)
+    game.profile_next_move = profile_ai
+    # Per-frame phase timings; F2 prints them, F9 profiles the next AI move
+    perf = FrameProfiler()
+    perf.instrument(game, 'check_game_over')
     buttons = [
         Button(WINDOW_WIDTH - 150, 50, BUTTON_WIDTH, BUTTON_HEIGHT, "New Game", 'new'),
         Button(WINDOW_WIDTH - 150, 120, BUTTON_WIDTH, BUTTON_HEIGHT, "Quit", 'quit')
@@ -83,21 +93,36 @@ def game_loop(n, opponent_type):
     paused_text = font.render("Waiting...", True, COLORS['text'])
     game_over_font = pygame.font.Font(None, 74)
     
+    renderer = BoardRenderer(n)
+    panel_rect = pygame.Rect(CELL_SIZE * n + 2 * MARGIN, 0, 200, WINDOW_HEIGHT)
+    status_text = None
+    game_over_drawn = False
+    screen.fill(COLORS['background'])
+    
     clock = pygame.time.Clock()
     
     running = True
     while running:
-        screen.fill(COLORS['background'])
+        dirty_rects = []
         
         # Handle events
         for event in pygame.event.get():
             if event.type == QUIT:
+                if show_perf:
+                    print_perf(game, perf)
                 pygame.quit()
                 sys.exit()
+            if event.type == KEYDOWN:
+                if event.key == K_F2:
+                    print_perf(game, perf)
+                elif event.key == K_F9:
+                    game.profile_next_move = profile_ai or 'sample'
             if event.type == MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
                 for btn in buttons:
                     if btn.is_clicked(pos):
+                        if show_perf:
+                            print_perf(game, perf)
                         if btn.action == 'quit':
                             pygame.quit()
                             return 'quit'
@@ -112,48 +137,91 @@ def game_loop(n, opponent_type):
                     row = (y - MARGIN) // CELL_SIZE
                     if 0 <= row < n and 0 <= col < n:
                         game.handle_click(row, col)
+            if event.type == VIDEOEXPOSE:
+                renderer.invalidate()
+                status_text = None
+                game_over_drawn = False
         
         # Update animations
-        game.update_animations()
+        with perf.phase('update_animations'):
+            game.update_animations()
         
         # AI move
         if not game.game_over and not game.animations:
-            game.ai_move()
+            with perf.phase('ai_move'):
+                game.ai_move()
         
-        # Drawing
-        draw_board(screen, game)
-        for btn in buttons:
-            btn.draw(screen)
+        if game.game_over and game_over_drawn:
+            # Final frame is already on screen
+            with perf.phase('idle'):
+                clock.tick(IDLE_FPS)
+            perf.end_frame()
+            continue
+        
+        # Drawing - only the parts of the screen that changed
+        with perf.phase('draw_board'):
+            dirty_rects.extend(renderer.draw(screen, game))
         
         # Draw turn indicator
         if game.ai_thinking:
-            screen.blit(ai_thinking_text, (WINDOW_WIDTH - 150, 180))
+            turn_text = ai_thinking_text
         elif time.time() < game.pause_until:
-            screen.blit(paused_text, (WINDOW_WIDTH - 150, 180))
+            turn_text = paused_text
         else:
             turn_text = player_turn_text_w if game.current_player == 'W' else player_turn_text_b
+        if turn_text is not status_text:
+            screen.fill(COLORS['background'], panel_rect)
+            for btn in buttons:
+                btn.draw(screen)
             screen.blit(turn_text, (WINDOW_WIDTH - 150, 180))
+            status_text = turn_text
+            dirty_rects.append(panel_rect)
         
-        # Game over message
+        # Game over message - rendered once, the loop then idles
         if game.game_over:
-            text = game_over_font.render(f"Player {'White' if game.winner == 'W' else 'Black'} wins!", 
-                                        True, COLORS['text'])
+            if game.winner is None:
+                message = "Draw!"
+            else:
+                message = f"Player {'White' if game.winner == 'W' else 'Black'} wins!"
+            text = game_over_font.render(message, True, COLORS['text'])
             text_rect = text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2))
             # Draw semi-transparent overlay
             overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
             overlay.fill((0, 0, 0, 128))
             screen.blit(overlay, (0, 0))
             screen.blit(text, text_rect)
+            game_over_drawn = True
+            dirty_rects = [screen.get_rect()]
         
-        pygame.display.flip()
-        clock.tick(FPS)
+        if dirty_rects:
+            with perf.phase('display_update'):
+                pygame.display.update(dirty_rects)
+        with perf.phase('idle'):
+            clock.tick(FPS if game.animations else IDLE_FPS)
+        perf.end_frame()
 
-def start_game():
+def start_game(engine=None, clock=None, show_perf=False, profile_ai=None):
     while True:
         n, opponent = setup_screen()
-        result = game_loop(n, opponent)
+        result = game_loop(n, opponent, engine, clock, show_perf, profile_ai)
         if result == 'quit':
             break
 
 if __name__ == "__main__":
-    start_game()
\ No newline at end of file
+    engine = None
+    if '--engine' in sys.argv:
+        # Play against an engine server, e.g. --engine 127.0.0.1:7777 or --engine /tmp/checkers.sock
+        from client import EngineClient
+        engine = EngineClient(sys.argv[sys.argv.index('--engine') + 1])
+    clock = None
+    if '--clock' in sys.argv:
+        # AI game clock as MINUTES+INCREMENT_SECONDS, e.g. --clock 5+2
+        minutes, _, increment = sys.argv[sys.argv.index('--clock') + 1].partition('+')
+        clock = (float(minutes) * 60, float(increment or 0))
+    # --perf: print frame phase timings and AI latencies when leaving a game
+    # --profile-ai [sample|cprofile]: profile the first AI move of each game into profiles/
+    profile_ai = None
+    if '--profile-ai' in sys.argv:
+        i = sys.argv.index('--profile-ai') + 1
+        profile_ai = sys.argv[i] if i < len(sys.argv) and sys.argv[i] in ('sample', 'cprofile') else 'sample'
+    start_game(engine, clock, '--perf' in sys.argv, profile_ai)
\ No newline at end of file
@@ -0,0 +1,122 @@
+import sys
+from checkers import get_all_valid_moves
+
+class NodePool:
+    """Allocates MCTS nodes from a free list and keeps the live tree within a node budget.
+
+    The budget is a node count and/or bytes (turned into a count from the measured size of
+    the first node). When it is reached, prune() collapses the least visited subtrees: their
+    nodes go back to the free list and the subtree's root becomes a leaf again, keeping its
+    own wins and visits, which already include everything searched below it. If that cannot
+    bring the tree under the budget (the root's children are all leaves already), the pool
+    is stalled: the search stops adding nodes and stops pruning until nodes are released.
+    """
+    def __init__(self, max_nodes=100000, max_bytes=None, low_water=0.75):
+        if max_nodes is None and max_bytes is None:
+            raise ValueError("NodePool needs max_nodes or max_bytes")
+        self.max_nodes = max_nodes
+        self.max_bytes = max_bytes
+        self.low_water = low_water  # prune down to this fraction of the budget
+        self.node_bytes = None
+        self.free = []
+        self.live = 0
+        self.allocated = 0
+        self.reused = 0
+        self.prunes = 0
+        self.collapsed = 0
+        self.stalled = False
+
+    def new(self, cls, board, player, parent=None, move=None):
+        if self.free and type(self.free[-1]) is cls:
+            node = self.free.pop()
+            node.reset(board, player, parent, move)
+            self.reused += 1
+        else:
+            node = cls(board, player, parent, move)
+            self.allocated += 1
+            if self.node_bytes is None:
+                self.node_bytes = estimate_node_bytes(node)
+        self.live += 1
+        return node
+
+    def capacity(self):
+        limits = []
+        if self.max_nodes is not None:
+            limits.append(self.max_nodes)
+        if self.max_bytes is not None and self.node_bytes:
+            limits.append(max(1, self.max_bytes // self.node_bytes))
+        return min(limits) if limits else None
+
+    def full(self):
+        capacity = self.capacity()
+        return capacity is not None and self.live >= capacity
+
+    def can_expand(self):
+        return not (self.stalled and self.full())
+
+    def release(self, node):
+        # Returns node and everything below it to the free list
+        self.stalled = False
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            stack.extend(current.children)
+            current.children = []
+            current.parent = None
+            self.free.append(current)
+            self.live -= 1
+
+    def collapse(self, node):
+        """Turns node back into a leaf; its statistics stay, its subtree is freed."""
+        for child in node.children:
+            self.release(child)
+        node.children = []
+        node.untried_moves = get_all_valid_moves(node.board, node.player)
+        self.collapsed += 1
+
+    def prune(self, root):
+        """Collapses the least visited subtrees below root until the tree is back under the low-water mark."""
+        target = int(self.capacity() * self.low_water)
+        candidates = []
+        stack = list(root.children)
+        while stack:
+            node = stack.pop()
+            if node.children:
+                candidates.append(node)
+                stack.extend(node.children)
+        # Fewest visits first; on a tie the deeper (smaller) subtree goes first
+        candidates.sort(key=lambda node: node.visits)
+        for node in candidates:
+            if self.live <= target:
+                break
+            # Skip nodes already freed as part of an earlier collapse
+            if node.parent is not None:
+                self.collapse(node)
+        self.prunes += 1
+        # Nothing left to collapse - pruning again every iteration would only rescan the tree
+        self.stalled = self.full()
+
+    def stats(self):
+        return {
+            'live': self.live,
+            'free': len(self.free),
+            'capacity': self.capacity(),
+            'node_bytes': self.node_bytes,
+            'allocated': self.allocated,
+            'reused': self.reused,
+            'prunes': self.prunes,
+            'collapsed': self.collapsed,
+            'stalled': self.stalled,
+        }
+
+def estimate_node_bytes(node):
+    """Approximate memory held by one node: the object, its board and its move lists."""
+    size = sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+    size += sys.getsizeof(node.board) + sum(sys.getsizeof(row) for row in node.board)
+    size += sys.getsizeof(node.children) + sys.getsizeof(node.untried_moves)
+    size += sum(sys.getsizeof(move) for move in node.untried_moves)
+    amaf = getattr(node, 'amaf', None)
+    if amaf is not None:
+        # AMAF tables fill up to about one entry per legal move
+        size += sys.getsizeof(amaf) + len(node.untried_moves) * (sys.getsizeof([0, 0]) + 100)
+    return size
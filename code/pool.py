@@ -0,0 +1,286 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from checkers import initialize_board, get_all_valid_moves, search_root, MCTSNode, mcts, RaveNode, mcts_rave
+from tablebase import load_tablebase
+from timeman import DeadlineEvaluator, SearchTimeout
+
+WARM_SIZES = (8, 10, 12)  # board sizes whose tables are built before a worker reports ready
+MCTS_STEP = 10  # MCTS iterations between deadline checks inside a job
+LIVENESS_CHECK = 0.5  # seconds between checks for crashed workers while no results arrive
+
+class PoolBusy(Exception):
+    pass
+
+_evaluator = None
+
+def _worker_evaluator():
+    global _evaluator
+    if _evaluator is None:
+        try:
+            from evaluation import PSTEvaluator
+            from cache import cached
+            _evaluator = cached(PSTEvaluator())
+        except ImportError:
+            from checkers import evaluate_board
+            _evaluator = evaluate_board
+    return _evaluator
+
+def warm_up(sizes):
+    # Build per-size tables and touch the move generator so the first real search pays nothing extra
+    from hashing import zobrist_keys
+    evaluate = _worker_evaluator()
+    for n in sizes:
+        zobrist_keys(n)
+        load_tablebase(n)
+        board = initialize_board(n)
+        get_all_valid_moves(board, 'W')
+        evaluate(board, 'W')
+
+def search_job(board, player, ai_type, amount, seed, deadline=None):
+    """Runs one scheduled piece of a search in a worker process.
+
+    minmax: a full search to depth `amount`, returns ('minmax', move, score), or
+    ('minmax', None, None) when the deadline (a time.time() value) passes first.
+    mcts / mcts_rave: up to `amount` iterations, fewer if the deadline passes; returns
+    ('mcts', [(move, visits, wins), ...]) for the root children.
+    """
+    tablebase = load_tablebase(len(board))
+    if ai_type == 'minmax':
+        evaluate = _worker_evaluator()
+        if deadline is not None:
+            evaluate = DeadlineEvaluator(evaluate, deadline)
+        try:
+            move, score = search_root(board, player, amount, evaluate, tablebase)
+        except SearchTimeout:
+            return 'minmax', None, None
+        return 'minmax', move, score
+    random.seed(seed)
+    root = RaveNode(board, player) if ai_type == 'mcts_rave' else MCTSNode(board, player)
+    search = mcts_rave if ai_type == 'mcts_rave' else mcts
+    done = 0
+    while done < amount and (deadline is None or time.time() < deadline):
+        step = min(MCTS_STEP, amount - done)
+        search(root, step, tablebase=tablebase)
+        done += step
+    return 'mcts', [(child.move, child.visits, child.wins) for child in root.children]
+
+def _worker_main(worker_id, inbox, outbox, sizes):
+    start = time.time()
+    warm_up(sizes)
+    outbox.put(('ready', worker_id, None, time.time() - start))
+    while True:
+        item = inbox.get()
+        if item is None:
+            break
+        job_id, args = item
+        started = time.time()
+        try:
+            outbox.put(('done', worker_id, job_id, (search_job(*args), time.time() - started)))
+        except Exception as e:
+            outbox.put(('error', worker_id, job_id, (repr(e), time.time() - started)))
+
+class EnginePool:
+    """Pre-warmed engine processes shared by many game sessions.
+
+    A session is pinned to one worker on its first job, so that worker's evaluation cache
+    keeps serving the same game. Idle workers take work from other sessions when their own
+    are empty, so pinning is a preference for cache locality, not a guarantee: a session's
+    job may run on another worker rather than wait. Sessions are served round-robin, and
+    submit() raises PoolBusy once the pool holds max_pending jobs (or a session holds
+    max_per_session). A worker that dies fails its running job with RuntimeError and is
+    replaced by a fresh one.
+    """
+    def __init__(self, workers=None, sizes=WARM_SIZES, max_pending=64, max_per_session=4):
+        self.workers = workers or os.cpu_count() or 1
+        self.sizes = sizes
+        self.max_pending = max_pending
+        self.max_per_session = max_per_session
+        self.lock = threading.Condition()
+        self.job_ids = itertools.count()
+        self.pending = {}            # session -> deque of (job_id, args, future, submitted_at)
+        self.session_order = deque()  # sessions with pending jobs, in round-robin order
+        self.pins = {}               # session -> worker
+        self.idle = set()
+        self.running = {}            # job_id -> (future, session, worker, dispatched_at)
+        self.load = [0] * self.workers  # sessions pinned to each worker
+        self.busy_time = [0.0] * self.workers
+        self.queue_latencies = deque(maxlen=1000)
+        self.completed = 0
+        self.rejected = 0
+        self.warm_times = []
+        self.started_at = None
+        self.restarts = 0
+        self.processes = []
+        self.inboxes = []
+        self.outbox = None
+        self.collector = None
+        self.closing = False
+
+    def _spawn(self, worker_id):
+        ctx = multiprocessing.get_context()
+        inbox = ctx.Queue()
+        process = ctx.Process(target=_worker_main, args=(worker_id, inbox, self.outbox, self.sizes), daemon=True)
+        process.start()
+        return inbox, process
+
+    def start(self):
+        self.outbox = multiprocessing.get_context().Queue()
+        for worker_id in range(self.workers):
+            inbox, process = self._spawn(worker_id)
+            self.inboxes.append(inbox)
+            self.processes.append(process)
+        # Wait until every worker has built its tables
+        for _ in range(self.workers):
+            kind, worker_id, _, warm_time = self.outbox.get()
+            self.warm_times.append(warm_time)
+            self.idle.add(worker_id)
+        self.started_at = time.time()
+        self.collector = threading.Thread(target=self._collect, daemon=True)
+        self.collector.start()
+        return self
+
+    def submit(self, session, *args):
+        future = Future()
+        with self.lock:
+            queued = sum(len(jobs) for jobs in self.pending.values())
+            if queued + len(self.running) >= self.max_pending or \
+               len(self.pending.get(session, ())) >= self.max_per_session:
+                self.rejected += 1
+                raise PoolBusy("engine pool is full")
+            if session not in self.pins:
+                worker = min(range(self.workers), key=lambda w: self.load[w])
+                self.pins[session] = worker
+                self.load[worker] += 1
+            if not self.pending.get(session):
+                self.pending[session] = deque()
+                self.session_order.append(session)
+            self.pending[session].append((next(self.job_ids), args, future, time.time()))
+            self._schedule()
+        return future
+
+    def release(self, session):
+        # Forget a finished session; its queued jobs are cancelled
+        with self.lock:
+            worker = self.pins.pop(session, None)
+            if worker is not None:
+                self.load[worker] -= 1
+            for _, _, future, _ in self.pending.pop(session, ()):
+                future.cancel()
+            if session in self.session_order:
+                self.session_order.remove(session)
+
+    def _next_job(self, worker):
+        # First session in round-robin order pinned to this worker, otherwise the first one at all
+        chosen = next((s for s in self.session_order if self.pins.get(s) == worker), None)
+        if chosen is None and self.session_order:
+            chosen = self.session_order[0]
+        if chosen is None:
+            return None
+        self.session_order.remove(chosen)
+        jobs = self.pending[chosen]
+        job = jobs.popleft()
+        if jobs:
+            self.session_order.append(chosen)
+        else:
+            del self.pending[chosen]
+        return chosen, job
+
+    def _schedule(self):
+        for worker in sorted(self.idle):
+            while True:
+                picked = self._next_job(worker)
+                if picked is None:
+                    return
+                session, (job_id, args, future, submitted_at) = picked
+                # Jobs cancelled while queued are dropped
+                if future.set_running_or_notify_cancel():
+                    break
+            now = time.time()
+            self.queue_latencies.append(now - submitted_at)
+            self.idle.discard(worker)
+            self.running[job_id] = (future, session, worker, now)
+            self.inboxes[worker].put((job_id, args))
+
+    def _replace_dead_workers(self):
+        # A crashed worker never reports its job; fail the job and start a new worker in its place
+        failed = []
+        with self.lock:
+            for worker, process in enumerate(self.processes):
+                if process.is_alive() or self.closing:
+                    continue
+                for job_id, (future, _, job_worker, _) in list(self.running.items()):
+                    if job_worker == worker:
+                        del self.running[job_id]
+                        failed.append(future)
+                self.idle.discard(worker)
+                self.inboxes[worker], self.processes[worker] = self._spawn(worker)
+                self.restarts += 1
+        for future in failed:
+            future.set_exception(RuntimeError("engine worker died during the search"))
+
+    def _collect(self):
+        last_check = time.time()
+        while True:
+            if time.time() - last_check >= LIVENESS_CHECK:
+                self._replace_dead_workers()
+                last_check = time.time()
+            try:
+                message = self.outbox.get(timeout=LIVENESS_CHECK)
+            except queue.Empty:
+                continue
+            if message is None:
+                break
+            if message[0] == 'ready':
+                # A replacement worker has warmed up
+                with self.lock:
+                    self.idle.add(message[1])
+                    self._schedule()
+                continue
+            kind, worker, job_id, (payload, run_time) = message
+            with self.lock:
+                if job_id not in self.running:
+                    # Already failed as lost with its worker
+                    continue
+                future, session, _, _ = self.running.pop(job_id)
+                self.busy_time[worker] += run_time
+                self.completed += 1
+                self.idle.add(worker)
+                self._schedule()
+            if kind == 'done':
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def metrics(self):
+        with self.lock:
+            latencies = sorted(self.queue_latencies)
+            elapsed = max(time.time() - self.started_at, 1e-9) if self.started_at else 1e-9
+            return {
+                'workers': self.workers,
+                'pinned_sessions': len(self.pins),
+                'queued': sum(len(jobs) for jobs in self.pending.values()),
+                'running': len(self.running),
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'queue_ms_avg': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+                'queue_ms_p95': 1000 * latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+                'utilization': sum(self.busy_time) / (elapsed * self.workers),
+                'warm_ms_max': 1000 * max(self.warm_times) if self.warm_times else 0.0,
+                'restarts': self.restarts,
+            }
+
+    def close(self):
+        self.closing = True
+        for inbox in self.inboxes:
+            inbox.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+        if self.outbox is not None:
+            self.outbox.put(None)
@@ -0,0 +1,277 @@
+"""Profiling hooks: per-frame phase timing, AI latency histograms, single-move profiles
+and a fixed benchmark suite.
+
+    python3 main.py --perf                  # phase timings and AI latencies printed on leaving a game
+    python3 main.py --profile-ai            # profile the first AI move (F9 in game: the next one)
+    python3 profiling.py bench --json before.json
+    python3 profiling.py bench --compare before.json
+"""
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+
+class FrameProfiler:
+    """Time spent per frame in each named phase, over the last `window` frames.
+
+    Phases may nest (check_game_over runs inside update_animations); a phase's time
+    excludes the phases nested in it, so the columns add up to the frame time.
+    """
+    def __init__(self, window=600):
+        self.window = window
+        self.samples = {}  # phase -> deque of per-frame ms
+        self.frame_ms = deque(maxlen=window)
+        self.current = {}
+        self.stack = []
+        self.frame_start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self.stack.append(0.0)
+        try:
+            yield
+        finally:
+            nested = self.stack.pop()
+            elapsed = time.perf_counter() - start
+            if self.stack:
+                self.stack[-1] += elapsed
+            self.current[name] = self.current.get(name, 0.0) + (elapsed - nested) * 1000
+
+    def instrument(self, obj, name):
+        """Times every call of obj.name as a phase, including calls the object makes itself."""
+        method = getattr(obj, name)
+
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return method(*args, **kwargs)
+        setattr(obj, name, timed)
+
+    def end_frame(self):
+        now = time.perf_counter()
+        self.frame_ms.append((now - self.frame_start) * 1000)
+        self.frame_start = now
+        for name in self.samples.keys() | self.current.keys():
+            if name not in self.samples:
+                # Phase first seen now - earlier frames spent nothing in it
+                self.samples[name] = deque([0.0] * (len(self.frame_ms) - 1), maxlen=self.window)
+            self.samples[name].append(self.current.get(name, 0.0))
+        self.current = {}
+
+    def summary(self):
+        """phase -> (mean ms, p95 ms, max ms) over the window; 'frame' is the whole frame."""
+        result = {}
+        for name, values in [('frame', self.frame_ms)] + sorted(self.samples.items()):
+            if values:
+                ordered = sorted(values)
+                result[name] = (sum(ordered) / len(ordered), ordered[int(0.95 * (len(ordered) - 1))], ordered[-1])
+        return result
+
+    def report(self):
+        lines = [f"{len(self.frame_ms)} frames   {'mean':>8} {'p95':>8} {'max':>8}  (ms)"]
+        for name, (mean, p95, worst) in self.summary().items():
+            lines.append(f"  {name:18s} {mean:8.2f} {p95:8.2f} {worst:8.2f}")
+        return '\n'.join(lines)
+
+class LatencyHistogram:
+    """Counts of AI move latencies in fixed millisecond buckets."""
+    BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+    def __init__(self, bounds=BOUNDS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is everything above the largest bound
+        self.total = 0.0
+        self.worst = 0.0
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        i = 0
+        while i < len(self.bounds) and ms > self.bounds[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += ms
+        self.worst = max(self.worst, ms)
+
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, p):
+        # Upper bound of the bucket holding the p-th percentile
+        target = p / 100 * self.count()
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return self.bounds[i] if i < len(self.bounds) else self.worst
+        return 0.0
+
+    def report(self, title='AI move latency'):
+        moves = self.count()
+        if not moves:
+            return f"{title}: no moves"
+        lines = [f"{title}: {moves} moves, mean {self.total / moves:.1f} ms, p50 <= {self.percentile(50):g} ms, "
+                 f"p95 <= {self.percentile(95):g} ms, max {self.worst:.1f} ms"]
+        peak = max(self.counts)
+        lower = 0
+        for i, count in enumerate(self.counts):
+            upper = f"{self.bounds[i]}" if i < len(self.bounds) else 'inf'
+            if count:
+                lines.append(f"  {lower:>6}-{upper:<6} ms {count:5d} {'#' * max(1, round(30 * count / peak))}")
+            lower = self.bounds[i] if i < len(self.bounds) else lower
+        return '\n'.join(lines)
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval and counts collapsed stacks."""
+    def __init__(self, thread_id=None, interval=0.001):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks = {}
+        self.running = False
+        self.thread = None
+
+    def _sample(self):
+        while self.running:
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                stack = ';'.join(reversed(names))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            time.sleep(self.interval)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def collapsed(self):
+        # Brendan Gregg's folded format, one 'frame;frame;frame count' line per stack
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+def profile_call(func, *args, name='ai_move', mode='sample', directory=PROFILE_DIR, interval=0.001, **kwargs):
+    """Runs func(*args, **kwargs) under a profiler and writes the result to directory.
+
+    mode 'sample' writes <name>_<time>.folded (collapsed stacks for flamegraph.pl or
+    speedscope); mode 'cprofile' writes a .prof file for pstats/snakeviz and a .txt listing.
+    Returns (func's result, list of paths written).
+    """
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{name}_{time.strftime('%Y%m%d-%H%M%S')}")
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args, **kwargs)
+        profiler.dump_stats(base + '.prof')
+        listing = io.StringIO()
+        pstats.Stats(profiler, stream=listing).sort_stats('cumulative').print_stats(40)
+        with open(base + '.txt', 'w') as f:
+            f.write(listing.getvalue())
+        return result, [base + '.prof', base + '.txt']
+
+    sampler = StackSampler(interval=interval)
+    # Let the sampler thread take the GIL about as often as it wants to sample
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(min(switch_interval, interval))
+    sampler.start()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        sampler.stop()
+        sys.setswitchinterval(switch_interval)
+    with open(base + '.folded', 'w') as f:
+        f.write(sampler.collapsed())
+    return result, [base + '.folded']
+
+# Fixed positions, '<side to move> <board>' in engine.py's board text format. Do not edit:
+# results are only comparable across versions while these stay the same.
+BENCHMARK_POSITIONS = [
+    ('opening-8', "W w.w.w.w./.w.w.w.w/w.w.w.w./......../......../.b.b.b.b/b.b.b.b./.b.b.b.b"),
+    ('middlegame-8', "W w.w...w./.w.....w/w...w.w./......../b......./.......b/b......./.....b.b"),
+    ('kings-8', "W ......../......../B.....w./......../......../......../......../...W...b"),
+    ('opening-10', "W w.w.w.w.w./.w.w.w.w.w/w.w.w.w.w./.w.w.w.w.w/........../........../b.b.b.b.b./"
+                   ".b.b.b.b.b/b.b.b.b.b./.b.b.b.b.b"),
+    ('middlegame-10', "W w.w.w.w.w./.w.w.w.w.w/......w.w./.w.w....../......w.../...b...w../b.b......./"
+                      ".b...b.b.b/b.b...b.b./.b.b.b.b.b"),
+]
+
+def run_benchmarks(max_depth=6, iterations=500, seed=0):
+    """Time to each minmax depth and MCTS iterations per second on the fixed positions."""
+    from engine import board_from_text
+    from checkers import search_root, MCTSNode, mcts, RaveNode, mcts_rave
+    results = {}
+    for name, position in BENCHMARK_POSITIONS:
+        player, text = position.split()
+        board = board_from_text(text)
+        entry = {'time_to_depth': {}}
+        # Deeper searches on bigger boards take much longer - keep the suite in minutes
+        depth_limit = max_depth if len(board) <= 8 else max_depth - 1
+        elapsed = 0.0
+        for depth in range(1, depth_limit + 1):
+            start = time.perf_counter()
+            search_root(board, player, depth)
+            elapsed += time.perf_counter() - start
+            entry['time_to_depth'][depth] = elapsed
+        for ai_type, node_class, search in (('mcts', MCTSNode, mcts), ('mcts_rave', RaveNode, mcts_rave)):
+            random.seed(seed)
+            start = time.perf_counter()
+            search(node_class(board, player), iterations)
+            entry[f'{ai_type}_ips'] = iterations / (time.perf_counter() - start)
+        results[name] = entry
+    return results
+
+def format_benchmarks(results, baseline=None):
+    lines = []
+    for name, entry in results.items():
+        old = baseline.get(name) if baseline else None
+        depths = entry['time_to_depth']
+        line = f"{name:14s} " + ' '.join(f"d{d}={seconds * 1000:.0f}ms" for d, seconds in depths.items())
+        line += f"  mcts {entry['mcts_ips']:.0f} it/s  rave {entry['mcts_rave_ips']:.0f} it/s"
+        if old:
+            # Ratios above 1.00 are faster than the baseline
+            deepest = max(depths)
+            old_time = old['time_to_depth'].get(str(deepest), old['time_to_depth'].get(deepest))
+            if old_time:
+                line += f"  | depth x{old_time / depths[deepest]:.2f}"
+            line += f" mcts x{entry['mcts_ips'] / old['mcts_ips']:.2f} rave x{entry['mcts_rave_ips'] / old['mcts_rave_ips']:.2f}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Engine benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+    bench = commands.add_parser('bench', help="time-to-depth and iterations/sec on fixed positions")
+    bench.add_argument('--depth', type=int, default=6)
+    bench.add_argument('--iterations', type=int, default=500)
+    bench.add_argument('--json', help="save the results for a later --compare")
+    bench.add_argument('--compare', help="results file of an earlier run")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.depth, args.iterations)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print(format_benchmarks(results, baseline))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0],
+                       'results': results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Self-play dataset generator.
+
+Games run in a process pool and every searched position is appended to shard files of
+fixed-size records, readable directly with np.memmap(path, dtype=record_dtype(n)):
+
+    board   packed squares, two per byte (low nibble first), codes as in evaluation.py
+    side    0 = White to move, 1 = Black
+    score   search score from the side to move's point of view
+    move    chosen move (sr, sc, er, ec); the first step of a multi-capture
+    result  final result for White: 1 win, 0 draw, -1 loss
+
+manifest.json in the output directory records the finished games and shard sizes, so an
+interrupted run picks up where it stopped when started again with the same arguments.
+
+    python3 selfplay.py --size 8 --games 10000 --depth 3 --out selfplay/8
+"""
+import json
+import os
+import random
+import time
+import numpy as np
+from checkers import initialize_board, get_all_valid_moves, search_root
+from evaluation import PIECE_CODES, PSTEvaluator
+from history import PositionHistory
+
+DATASET_FORMAT = 2  # 1 stored odd-depth scores with the wrong sign
+SHARD_RECORDS = 1 << 20  # records per shard file
+MANIFEST = 'manifest.json'
+
+def record_dtype(n):
+    return np.dtype([('board', 'u1', ((n * n + 1) // 2,)), ('side', 'u1'), ('score', '<f4'),
+                     ('move', 'u1', (4,)), ('result', 'i1')])
+
+def pack_board(board):
+    codes = np.array([PIECE_CODES[piece] for row in board for piece in row], dtype=np.uint8)
+    if len(codes) % 2:
+        codes = np.append(codes, 0)
+    return codes[0::2] | (codes[1::2] << 4)
+
+def unpack_boards(packed, n):
+    """(records, n, n) int8 square codes from the packed board column."""
+    codes = np.empty(packed.shape[:-1] + (packed.shape[-1] * 2,), dtype=np.int8)
+    codes[..., 0::2] = packed & 0x0F
+    codes[..., 1::2] = packed >> 4
+    return codes[..., :n * n].reshape(packed.shape[:-1] + (n, n))
+
+def play(n, depth=3, random_plies=6, seed=None, max_plies=300):
+    """One headless self-play game, shared by this dataset generator and tuning.py.
+
+    Returns (plies, result): plies is [(board before the move, player, move, search score), ...]
+    with a None score for the random opening plies, result is for White: 1 win, 0 draw, -1 loss.
+    """
+    rng = random.Random(seed)
+    random.seed(rng.getrandbits(32))
+    board = initialize_board(n)
+    player = 'W'
+    history = PositionHistory(board, player)
+    evaluate = PSTEvaluator()
+    plies = []
+    result = 0
+    for ply in range(max_plies):
+        moves = get_all_valid_moves(board, player)
+        if not moves:
+            result = -1 if player == 'W' else 1
+            break
+        if history.is_draw():
+            break
+        if ply < random_plies:
+            # Varied openings
+            move, score = rng.choice(moves), None
+        else:
+            move, score = search_root(board, player, depth, evaluate, history=history)
+        plies.append(([row[:] for row in board], player, move, score))
+        history.make_move(board, move, player)
+        player = 'B' if player == 'W' else 'W'
+    return plies, result
+
+def play_game(n, depth=3, random_plies=6, seed=None, max_plies=300):
+    """One self-play game as a record array, one row per searched position."""
+    plies, result = play(n, depth, random_plies, seed, max_plies)
+    # The random opening plies are not recorded
+    rows = [(board, player, move, score) for board, player, move, score in plies if score is not None]
+    records = np.zeros(len(rows), dtype=record_dtype(n))
+    for i, (board, player, move, score) in enumerate(rows):
+        records[i] = (pack_board(board), player == 'B', score, move, result)
+    return records
+
+def _play(args):
+    return play_game(*args)
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def write_manifest(directory, manifest):
+    # Written after the shard data is on disk, and atomically, so it never claims unwritten records
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def open_shards(directory):
+    """Read-only memmaps of every shard listed in the manifest."""
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return []
+    dtype = record_dtype(manifest['board_size'])
+    return [np.memmap(os.path.join(directory, shard['file']), dtype=dtype, mode='r', shape=(shard['records'],))
+            for shard in manifest['shards'] if shard['records']]
+
+def generate(directory, n, games, depth=3, workers=None, seed=0, shard_records=SHARD_RECORDS, progress=None):
+    """Plays games until the dataset in directory holds `games` of them; returns the manifest."""
+    os.makedirs(directory, exist_ok=True)
+    settings = {'board_size': n, 'depth': depth, 'seed': seed}
+    manifest = read_manifest(directory)
+    if manifest is None:
+        manifest = {'format': DATASET_FORMAT, **settings, 'record_size': record_dtype(n).itemsize,
+                    'games': 0, 'records': 0, 'shards': []}
+    elif manifest.get('format') != DATASET_FORMAT:
+        raise ValueError(f"{directory} holds a format {manifest.get('format')} dataset; "
+                         f"this version writes format {DATASET_FORMAT}")
+    elif any(manifest.get(key) != value for key, value in settings.items()):
+        raise ValueError(f"{directory} holds a dataset made with different settings: "
+                         f"{ {key: manifest.get(key) for key in settings} }")
+
+    # Drop anything appended after the last manifest update (an interrupted run)
+    for shard in manifest['shards']:
+        path = os.path.join(directory, shard['file'])
+        size = shard['records'] * manifest['record_size']
+        if os.path.exists(path) and os.path.getsize(path) != size:
+            with open(path, 'r+b') as f:
+                f.truncate(size)
+
+    jobs = [(n, depth, 6, seed + i) for i in range(manifest['games'], games)]
+    if not jobs:
+        return manifest
+    if workers == 1:
+        pool = None
+        finished = map(_play, jobs)
+    else:
+        from multiprocessing import Pool
+        pool = Pool(workers)
+        # In order, so the manifest's game count always covers a prefix of the seeds
+        finished = pool.imap(_play, jobs)
+    start = time.time()
+    try:
+        for records in finished:
+            if not manifest['shards'] or manifest['shards'][-1]['records'] >= shard_records:
+                manifest['shards'].append({'file': f"shard_{len(manifest['shards']):05d}.bin", 'records': 0})
+            shard = manifest['shards'][-1]
+            # A new shard starts empty even if an interrupted run left a file behind
+            with open(os.path.join(directory, shard['file']), 'ab' if shard['records'] else 'wb') as f:
+                f.write(records.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            shard['records'] += len(records)
+            manifest['games'] += 1
+            manifest['records'] += len(records)
+            write_manifest(directory, manifest)
+            if progress:
+                progress(manifest, time.time() - start)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return manifest
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a self-play dataset (resumes an interrupted run)")
+    parser.add_argument('--size', type=int, default=8)
+    parser.add_argument('--games', type=int, default=1000, help="total games wanted in the dataset")
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--shard-records', type=int, default=SHARD_RECORDS)
+    parser.add_argument('--out', default=None, help="output directory (default: selfplay/<size>)")
+    args = parser.parse_args()
+
+    directory = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'selfplay', str(args.size))
+
+    def report(manifest, elapsed):
+        if manifest['games'] % 10 == 0 or manifest['games'] == args.games:
+            print(f"{manifest['games']}/{args.games} games, {manifest['records']} positions, {elapsed:.0f}s")
+
+    manifest = generate(directory, args.size, args.games, args.depth, args.workers, args.seed,
+                        args.shard_records, report)
+    print(f"{directory}: {manifest['games']} games, {manifest['records']} positions in {len(manifest['shards'])} shards")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Asyncio engine server.
+
+One line per command, answers are lines too. Several clients can be connected at
+once (TCP, Unix socket or stdio); their searches are split into short jobs that
+share one pool of pre-warmed worker processes, so no client has to wait for another's whole search.
+
+    size <n>                       new game on an n x n board
+    position <W|B> <board>         set position, board rows joined by '/', e.g. w.w./..../..../.b.b
+                                   ('.' empty, 'w'/'b' men, 'W'/'B' kings)
+    go [minmax|mcts|mcts_rave] [depth D] [iterations I] [movetime MS]
+                                   search, aborted at movetime; streams 'info ...' lines, ends with 'bestmove r c r c' or 'bestmove none'
+    stop                           end the running search after its current job, bestmove is still sent
+    stats                          'stats key=value ...' for the server and this session
+    quit                           close the session
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+import traceback
+from checkers import initialize_board, get_all_valid_moves
+from engine import board_from_text, move_to_text
+from pool import EnginePool, PoolBusy
+from book import load_book
+from timeman import is_decided
+
+MCTS_CHUNK = 100  # iterations per scheduled MCTS job
+
+def parse_go(args):
+    options = {'ai_type': 'minmax', 'depth': 4, 'iterations': 500, 'movetime': None}
+    i = 0
+    while i < len(args):
+        if args[i] in ('minmax', 'mcts', 'mcts_rave'):
+            options['ai_type'] = args[i]
+            i += 1
+        elif args[i] in ('depth', 'iterations', 'movetime') and i + 1 < len(args):
+            options[args[i]] = int(args[i + 1])
+            i += 2
+        else:
+            raise ValueError(f"unknown go option '{args[i]}'")
+    return options
+
+class EngineServer:
+    def __init__(self, workers=None, pool=None, max_pending=64):
+        self.pool = pool or EnginePool(workers, max_pending=max_pending)
+        self.sessions = set()
+        self.searches = 0
+        # Back-pressure: a search waits here instead of overfilling the pool
+        self.slots = asyncio.Semaphore(self.pool.max_pending)
+        self.job_finished = asyncio.Condition()
+
+    async def start(self):
+        # Workers build their tables before the first client is accepted
+        if not self.pool.processes:
+            await asyncio.get_running_loop().run_in_executor(None, self.pool.start)
+
+    async def submit(self, session, *args):
+        async with self.slots:
+            async with self.job_finished:
+                while True:
+                    try:
+                        future = self.pool.submit(id(session), *args)
+                        break
+                    except PoolBusy:
+                        # Per-session limit reached - a finished job lets the pool dispatch one of its queued jobs
+                        await self.job_finished.wait()
+            try:
+                return await asyncio.wrap_future(future)
+            finally:
+                async with self.job_finished:
+                    self.job_finished.notify_all()
+
+    def stats(self):
+        stats = {'sessions': len(self.sessions), 'searches': self.searches}
+        for key, value in self.pool.metrics().items():
+            stats[key] = f"{value:.3f}" if isinstance(value, float) else value
+        return stats
+
+    async def handle_client(self, reader, writer):
+        session = Session(self, reader, writer)
+        self.sessions.add(session)
+        try:
+            await session.run()
+        finally:
+            self.sessions.discard(session)
+            if session.search:
+                session.search.cancel()
+            self.pool.release(id(session))
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def close(self):
+        self.pool.close()
+
+class Session:
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.board = initialize_board(8)
+        self.player = 'W'
+        self.search = None
+        self.stop_requested = False
+        self.searches = 0
+
+    async def send(self, line):
+        self.writer.write((line + '\n').encode())
+        await self.writer.drain()
+
+    async def run(self):
+        while True:
+            try:
+                line = await self.reader.readline()
+            except ConnectionError:
+                break
+            if not line:
+                # Input closed - let a running search send its bestmove first
+                if self.search and not self.search.done():
+                    await self.search
+                break
+            parts = line.decode().split()
+            if not parts:
+                continue
+            command, args = parts[0].lower(), parts[1:]
+            try:
+                if command == 'quit':
+                    break
+                await self.handle(command, args)
+            except (ValueError, KeyError, IndexError) as e:
+                await self.send(f"error {e}")
+
+    async def handle(self, command, args):
+        if command == 'size':
+            n = int(args[0])
+            if n < 4 or n % 2 != 0:
+                raise ValueError("board size must be an even number >= 4")
+            self.board = initialize_board(n)
+            self.player = 'W'
+            await self.send('ok')
+        elif command == 'position':
+            if args[0] not in ('W', 'B'):
+                raise ValueError("side to move must be W or B")
+            self.board = board_from_text(args[1])
+            self.player = args[0]
+            await self.send('ok')
+        elif command == 'go':
+            if self.search and not self.search.done():
+                raise ValueError("search already running")
+            options = parse_go(args)
+            self.stop_requested = False
+            board = [row[:] for row in self.board]
+            self.search = asyncio.create_task(self.go(board, self.player, **options))
+        elif command == 'stop':
+            self.stop_requested = True
+        elif command == 'stats':
+            stats = dict(self.server.stats(), session_searches=self.searches)
+            await self.send('stats ' + ' '.join(f"{key}={value}" for key, value in stats.items()))
+        else:
+            raise ValueError(f"unknown command '{command}'")
+
+    async def go(self, board, player, ai_type, depth, iterations, movetime):
+        self.searches += 1
+        self.server.searches += 1
+        start = time.time()
+        # Jobs are aborted inside the worker at the deadline, so movetime is kept to within a job's abort latency
+        deadline = start + movetime / 1000 if movetime else None
+        best_move = None
+
+        valid_moves = get_all_valid_moves(board, player)
+        if len(valid_moves) <= 1:
+            await self.send(f"bestmove {move_to_text(valid_moves[0] if valid_moves else None)}")
+            return
+
+        def out_of_time(next_job=0.0):
+            return self.stop_requested or (deadline is not None and time.time() + next_job >= deadline)
+
+        try:
+            book = load_book(len(board))
+            entry = book.probe(board, player) if book else None
+            if entry:
+                move, score = entry
+                await self.send(f"info book score {score:g} pv {move_to_text(move)}")
+                best_move = move
+            elif ai_type == 'minmax':
+                # Iterative deepening, one job per depth, so progress can be streamed between jobs
+                previous = None
+                for d in range(1, depth + 1):
+                    job_start = time.time()
+                    _, move, score = await self.server.submit(self, board, player, 'minmax', d, 0, deadline)
+                    if score is None:
+                        # Deadline reached inside this depth - keep the previous depth's move
+                        break
+                    if score == -math.inf and best_move is not None:
+                        # Every move loses at this depth - keep the shallower depth's choice, which holds out longer
+                        break
+                    best_move = move
+                    await self.send(f"info depth {d} score {round(score, 3) or 0:g} time {int((time.time() - start) * 1000)} pv {move_to_text(best_move)}")
+                    last = time.time() - job_start
+                    # The next depth costs about as many times more as this one did over the previous (as in timed_move)
+                    growth = max(2.0, last / previous) if previous else 4.0
+                    previous = max(last, 1e-6)
+                    # A forced result does not change with more depth
+                    if is_decided(score) or out_of_time(last * growth):
+                        break
+            else:
+                # Independent MCTS chunks, root visit counts are summed across them
+                totals = {}
+                done = 0
+                while done < iterations:
+                    chunk = min(MCTS_CHUNK, iterations - done)
+                    _, children = await self.server.submit(self, board, player, ai_type, chunk, random.getrandbits(32),
+                                                           deadline)
+                    for move, visits, wins in children:
+                        old_visits, old_wins = totals.get(move, (0, 0))
+                        totals[move] = (old_visits + visits, old_wins + wins)
+                    done += chunk
+                    if totals:
+                        best_move = max(totals, key=lambda m: totals[m][0])
+                        visits, wins = totals[best_move]
+                        await self.send(f"info iterations {done} visits {visits} score {wins / visits:.3f} time {int((time.time() - start) * 1000)} pv {move_to_text(best_move)}")
+                    if out_of_time():
+                        break
+        except Exception:
+            # A failed job must not leave the client waiting: log it and answer with what there is
+            print(f"search failed for session {id(self):x}:", file=sys.stderr)
+            traceback.print_exc()
+        await self.send(f"bestmove {move_to_text(best_move or valid_moves[0])}")
+
+class _StdoutWriter:
+    # Stand-in for StreamWriter when stdout is a regular file, which pipe transports refuse
+    def write(self, data):
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+async def _stdio_streams():
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    try:
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+        writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    except ValueError:
+        writer = _StdoutWriter()
+    return reader, writer
+
+async def serve(tcp=None, unix=None, stdio=False, workers=None):
+    server = EngineServer(workers)
+    await server.start()
+    listeners = []
+    if tcp:
+        host, port = tcp.rsplit(':', 1)
+        listeners.append(await asyncio.start_server(server.handle_client, host, int(port)))
+    if unix:
+        listeners.append(await asyncio.start_unix_server(server.handle_client, unix))
+    try:
+        if stdio:
+            reader, writer = await _stdio_streams()
+            await server.handle_client(reader, writer)
+        else:
+            await asyncio.gather(*(listener.serve_forever() for listener in listeners))
+    finally:
+        for listener in listeners:
+            listener.close()
+        await server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkers engine server")
+    parser.add_argument('--tcp', help="listen on HOST:PORT")
+    parser.add_argument('--unix', help="listen on a Unix socket path")
+    parser.add_argument('--stdio', action='store_true', help="serve one session on stdin/stdout")
+    parser.add_argument('--workers', type=int, default=None, help="search processes (default: CPU count)")
+    args = parser.parse_args()
+    if not (args.tcp or args.unix or args.stdio):
+        args.stdio = True
+    try:
+        asyncio.run(serve(args.tcp, args.unix, args.stdio, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Lazy-SMP parallel minmax.
+
+Several processes run iterative deepening on the same root at staggered depths and
+root move orders. They do not split the work explicitly; they share one transposition
+table in shared memory and each one cuts off what another has already searched.
+
+    python3 smp.py --size 8 --depth 6 --workers 1 2 4
+"""
+import copy
+import math
+import multiprocessing
+import queue
+import random
+import struct
+import time
+from multiprocessing import shared_memory
+from checkers import get_all_valid_moves, make_move_with_multiple_captures, evaluate_board, initialize_board
+from hashing import board_hash
+from tablebase import Tablebase
+
+# Entry: two 64-bit words, (key ^ data, data). A torn write from another process fails the
+# key check on read and the entry is treated as empty, so no lock is needed.
+DATA = struct.Struct('<fbBBx')  # score, depth, flag, best move index + 1
+EXACT, LOWER, UPPER = 0, 1, 2
+MAXIMIZING_KEY = 0x9E3779B97F4A7C15  # keeps max and min nodes of the same position apart
+CHECK_EVERY = 1024  # nodes between checks of the stop flag
+
+class SearchStopped(Exception):
+    pass
+
+class TranspositionTable:
+    """Fixed-size, lock-free hash table of search results in multiprocessing shared memory."""
+    def __init__(self, entries=1 << 18, name=None):
+        # Power of two so the index is a mask of the key
+        self.entries = 1 << max(1, (entries - 1).bit_length())
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.entries * 16)
+            self.shm.buf[:] = bytes(self.entries * 16)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.words = self.shm.buf.cast('Q')
+
+    def probe(self, key):
+        """(score, depth, flag, move index) stored for key, or None."""
+        i = (key & (self.entries - 1)) * 2
+        data = self.words[i + 1]
+        if self.words[i] ^ data != key or not data:
+            return None
+        score, depth, flag, move = DATA.unpack(data.to_bytes(8, 'little'))
+        return score, depth, flag, move - 1
+
+    def store(self, key, score, depth, flag, move_index):
+        i = (key & (self.entries - 1)) * 2
+        old = self.words[i + 1]
+        # Keep a deeper result for the same position
+        if old and self.words[i] ^ old == key and DATA.unpack(old.to_bytes(8, 'little'))[1] > depth:
+            return
+        data = int.from_bytes(DATA.pack(score, min(depth, 127), flag, move_index + 1), 'little')
+        self.words[i] = key ^ data
+        self.words[i + 1] = data
+
+    def close(self):
+        self.words.release()
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+class Searcher:
+    # One worker's alpha-beta over the shared table; same scores as checkers.minmax
+    def __init__(self, tt, evaluate=evaluate_board, tablebase=None, history=None, stop=None):
+        self.tt = tt
+        self.evaluate = evaluate
+        self.tablebase = tablebase
+        self.history = history
+        self.stop = stop
+        self.nodes = 0
+
+    def child(self, board, move, player, depth, alpha, beta, maximizing_player):
+        opponent = 'B' if player == 'W' else 'W'
+        if self.history is None:
+            make_move_with_multiple_captures(board, move, player)
+            return self.minmax(board, depth, alpha, beta, maximizing_player, opponent)
+        self.history.make_move(board, move, player)
+        try:
+            if self.history.is_draw(repetitions=2):
+                return 0
+            return self.minmax(board, depth, alpha, beta, maximizing_player, opponent)
+        finally:
+            self.history.pop()
+
+    def minmax(self, board, depth, alpha, beta, maximizing_player, player):
+        self.nodes += 1
+        if self.stop is not None and self.nodes % CHECK_EVERY == 0 and self.stop.is_set():
+            raise SearchStopped()
+        if self.tablebase is not None:
+            score = self.tablebase.score(board, player)
+            if score is not None:
+                return score if maximizing_player else -score
+        if depth == 0:
+            # From the maximizing side's point of view, as in checkers.minmax
+            return self.evaluate(board, player if maximizing_player else ('B' if player == 'W' else 'W'))
+
+        key = board_hash(board, player) ^ (MAXIMIZING_KEY if maximizing_player else 0)
+        entry = self.tt.probe(key)
+        tt_move = -1
+        if entry:
+            score, entry_depth, flag, tt_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return score
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        valid_moves = get_all_valid_moves(board, player)
+        order = list(range(len(valid_moves)))
+        if 0 <= tt_move < len(order):
+            # The stored best move first - usually the cheapest cutoff
+            order.remove(tt_move)
+            order.insert(0, tt_move)
+        alpha_start, beta_start = alpha, beta
+        best = -math.inf if maximizing_player else math.inf
+        best_index = -1
+        for i in order:
+            value = self.child(copy.deepcopy(board), valid_moves[i], player, depth - 1, alpha, beta, not maximizing_player)
+            if maximizing_player:
+                if value > best:
+                    best, best_index = value, i
+                alpha = max(alpha, value)
+            else:
+                if value < best:
+                    best, best_index = value, i
+                beta = min(beta, value)
+            if beta <= alpha:
+                break
+        flag = UPPER if best <= alpha_start else LOWER if best >= beta_start else EXACT
+        self.tt.store(key, best, depth, flag, best_index)
+        return best
+
+    def search_root(self, board, player, depth, shuffle=None):
+        valid_moves = get_all_valid_moves(board, player)
+        order = list(range(len(valid_moves)))
+        if shuffle is not None:
+            shuffle(order)
+        entry = self.tt.probe(board_hash(board, player) ^ MAXIMIZING_KEY)
+        if entry and 0 <= entry[3] < len(order):
+            order.remove(entry[3])
+            order.insert(0, entry[3])
+        best_move, best_value, best_index = None, -math.inf, -1
+        alpha = -math.inf
+        for i in order:
+            value = self.child(copy.deepcopy(board), valid_moves[i], player, depth - 1, alpha, math.inf, False)
+            if value > best_value or best_move is None:
+                best_move, best_value, best_index = valid_moves[i], value, i
+            alpha = max(alpha, value)
+        self.tt.store(board_hash(board, player) ^ MAXIMIZING_KEY, best_value, depth, EXACT, best_index)
+        return best_move, best_value
+
+def _search_worker(worker_id, tt_name, tt_entries, board, player, depth, evaluate, tablebase_path, history, stop,
+                   results):
+    tt = TranspositionTable(tt_entries, tt_name)
+    # Each worker maps the tablebase itself - an open mmap cannot be sent to a spawned process
+    tablebase = Tablebase(tablebase_path) if tablebase_path else None
+    searcher = Searcher(tt, evaluate, tablebase, history, stop)
+    rng = random.Random(worker_id)
+    start = time.time()
+    try:
+        d = 1
+        while d <= depth:
+            # Helpers: odd ones one ply deeper, all with their own root order
+            target = min(depth, d + worker_id % 2) if worker_id else d
+            move, score = searcher.search_root(board, player, target, rng.shuffle if worker_id else None)
+            results.put((worker_id, target, move, score, searcher.nodes, time.time() - start))
+            d = target + 1
+    except SearchStopped:
+        pass
+    finally:
+        results.put((worker_id, None, None, None, searcher.nodes, time.time() - start))
+        tt.close()
+        if tablebase is not None:
+            tablebase.close()
+
+def lazy_smp(board, player, depth, workers=2, evaluate=evaluate_board, tablebase=None, history=None,
+             tt_entries=1 << 18):
+    """Searches board with `workers` processes sharing a transposition table.
+
+    Returns (move, score, stats); the move comes from the first worker to finish `depth`.
+    stats holds nodes, nps and time_to_depth (seconds to finish each depth, first worker).
+
+    Workers reopen the tablebase from its path. evaluate and history are sent to them as
+    they are, so with the spawn start method (macOS, Windows) they must be picklable:
+    evaluate_board, PSTEvaluator and PositionHistory are; a CachedEvaluator is not.
+    """
+    tablebase_path = tablebase.path if tablebase is not None else None
+    tt = TranspositionTable(tt_entries)
+    start = time.time()
+    time_to_depth = {}
+    nodes = {}
+    best = None
+    try:
+        if workers <= 1:
+            results = queue.Queue()
+            _search_worker(0, tt.name, tt.entries, board, player, depth, evaluate, tablebase_path, history, None,
+                           results)
+            processes = []
+        else:
+            results = multiprocessing.Queue()
+            stop = multiprocessing.Event()
+            processes = [multiprocessing.Process(target=_search_worker, daemon=True,
+                                                 args=(i, tt.name, tt.entries, board, player, depth, evaluate,
+                                                       tablebase_path, history, stop, results))
+                         for i in range(workers)]
+            for process in processes:
+                process.start()
+        finished = 0
+        while finished < max(1, len(processes)):
+            worker_id, d, move, score, worker_nodes, elapsed = results.get()
+            nodes[worker_id] = worker_nodes
+            if d is None:
+                finished += 1
+                continue
+            time_to_depth.setdefault(d, elapsed)
+            if best is None or d > best[0]:
+                best = (d, move, score)
+            if d >= depth and processes:
+                stop.set()
+        for process in processes:
+            process.join()
+    finally:
+        tt.close()
+        tt.unlink()
+    elapsed = time.time() - start
+    total = sum(nodes.values())
+    stats = {'workers': max(1, workers), 'nodes': total, 'nps': total / elapsed if elapsed else 0.0,
+             'time': elapsed, 'time_to_depth': time_to_depth}
+    if best is None:
+        return None, None, stats
+    return best[1], best[2], stats
+
+def scaling_report(board, player, depth, worker_counts=(1, 2, 4), evaluate=evaluate_board):
+    """Nodes per second and time to each depth for each worker count, relative to the first count."""
+    rows = []
+    for workers in worker_counts:
+        move, score, stats = lazy_smp(board, player, depth, workers, evaluate)
+        rows.append((workers, move, score, stats))
+    base = rows[0][3]
+    depths = range(1, depth + 1)
+    lines = [f"{'workers':>7} {'nodes':>9} {'nps':>9} {'nps x':>6}  "
+             + ' '.join(f"{f'd{d}':>7}" for d in depths) + f" {'speedup':>7}  move"]
+    for workers, move, score, stats in rows:
+        times = stats['time_to_depth']
+        # Speedup in reaching the full depth, the number that matters for play
+        speedup = base['time_to_depth'][depth] / times[depth] if depth in times and depth in base['time_to_depth'] else 0.0
+        lines.append(f"{workers:>7} {stats['nodes']:>9} {stats['nps']:>9.0f} {stats['nps'] / base['nps']:>6.2f}  "
+                     + ' '.join(f"{times[d]:>6.2f}s" if d in times else f"{'-':>7}" for d in depths)
+                     + f" {speedup:>7.2f}  {move}")
+    return '\n'.join(lines)
+
+def main():
+    import argparse
+    import os
+    parser = argparse.ArgumentParser(description="Lazy-SMP scaling report")
+    parser.add_argument('--size', type=int, default=8)
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs, {args.size}x{args.size}, depth {args.depth}")
+    if max(args.workers) > (os.cpu_count() or 1):
+        print("more workers than CPUs - the extra workers share cores and cannot show real scaling")
+    print(scaling_report(initialize_board(args.size), 'W', args.depth, args.workers))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import itertools
+import mmap
+import os
+import struct
+import time
+from collections import deque
+from checkers import get_all_valid_moves, make_move_with_multiple_captures
+from hashing import board_hash
+
+# File layout: 16-byte header, then fixed 10-byte records sorted by position hash
+#   header: magic, version, board size, max pieces, record count
+#   record: hash (u64), result for the side to move (i8: 1 win, 0 draw, -1 loss), plies to the end (u8)
+MAGIC = b'CKTB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHBxI2x')
+RECORD = struct.Struct('<QbB')
+
+WIN, DRAW, LOSS = 1, 0, -1
+TB_WIN_SCORE = 1000  # minmax score of a won position, minus the plies needed to win
+
+TABLEBASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebases')
+
+def tablebase_path(n, max_pieces, directory=TABLEBASE_DIR):
+    return os.path.join(directory, f'tb_{n}_{max_pieces}.bin')
+
+def count_pieces(board):
+    white = black = 0
+    for row in board:
+        for piece in row:
+            if piece == 'W' or piece == 'WK':
+                white += 1
+            elif piece == 'B' or piece == 'BK':
+                black += 1
+    return white, black
+
+def enumerate_positions(n, max_pieces):
+    """Yields every (board, player) with 2..max_pieces pieces and at least one piece per side."""
+    squares = [(r, c) for r in range(n) for c in range(n) if (r + c) % 2 == 0]
+    for count in range(2, max_pieces + 1):
+        for placed in itertools.combinations(squares, count):
+            for pieces in itertools.product(('W', 'WK', 'B', 'BK'), repeat=count):
+                if not any(p[0] == 'W' for p in pieces) or not any(p[0] == 'B' for p in pieces):
+                    continue
+                # Men on their promotion row would already have been crowned
+                if any((p == 'W' and r == n - 1) or (p == 'B' and r == 0) for (r, c), p in zip(placed, pieces)):
+                    continue
+                board = [[' '] * n for _ in range(n)]
+                for (r, c), p in zip(placed, pieces):
+                    board[r][c] = p
+                yield board, 'W'
+                yield board, 'B'
+
+def generate(n, max_pieces, progress=None):
+    """Retrograde analysis. Returns {hash: (result, plies)} for every position in the table."""
+    hashes = []
+    index = {}
+    boards = []
+    for board, player in enumerate_positions(n, max_pieces):
+        h = board_hash(board, player)
+        index[h] = len(hashes)
+        hashes.append(h)
+        boards.append((board, player))
+
+    size = len(hashes)
+    result = [None] * size
+    plies = [0] * size
+    unresolved = [0] * size
+    predecessors = [[] for _ in range(size)]
+    queue = deque()
+
+    for i, (board, player) in enumerate(boards):
+        opponent = 'B' if player == 'W' else 'W'
+        moves = get_all_valid_moves(board, player)
+        if not moves:
+            # No legal move loses
+            result[i], plies[i] = LOSS, 0
+            queue.append(i)
+            continue
+        for move in moves:
+            new_board = [row[:] for row in board]
+            make_move_with_multiple_captures(new_board, move, player)
+            white, black = count_pieces(new_board)
+            if (white if opponent == 'W' else black) == 0:
+                # Capturing the last piece wins at once
+                if result[i] is None:
+                    result[i], plies[i] = WIN, 1
+                    queue.append(i)
+                continue
+            j = index[board_hash(new_board, opponent)]
+            predecessors[j].append(i)
+            unresolved[i] += 1
+        if progress and i % 10000 == 0:
+            progress(i, size)
+    boards = None
+
+    # Positions leave the queue in order of distance, so the first win found is the fastest
+    # and a loss is recorded when its last (longest) escape is refuted
+    while queue:
+        j = queue.popleft()
+        for i in predecessors[j]:
+            if result[i] is not None:
+                continue
+            if result[j] == LOSS:
+                result[i], plies[i] = WIN, plies[j] + 1
+                queue.append(i)
+            else:
+                unresolved[i] -= 1
+                if unresolved[i] == 0:
+                    result[i], plies[i] = LOSS, plies[j] + 1
+                    queue.append(i)
+
+    return {h: (DRAW if result[i] is None else result[i], min(plies[i], 255)) for i, h in enumerate(hashes)}
+
+def write_tablebase(table, n, max_pieces, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n, max_pieces, len(table)))
+        for h in sorted(table):
+            f.write(RECORD.pack(h, *table[h]))
+
+class Tablebase:
+    """Read-only tablebase file, memory-mapped and probed by binary search on the position hash."""
+    def __init__(self, path):
+        self.path = path  # lets another process open its own mapping
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n, self.max_pieces, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} tablebase")
+        if HEADER.size + self.count * RECORD.size > len(self.data):
+            raise ValueError(f"{path} is truncated")
+        self.hits = 0
+
+    def _find(self, h):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_hash = struct.unpack_from('<Q', self.data, HEADER.size + mid * RECORD.size)[0]
+            if mid_hash < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            record = RECORD.unpack_from(self.data, HEADER.size + lo * RECORD.size)
+            if record[0] == h:
+                return record
+        return None
+
+    def probe(self, board, player):
+        """Returns (result, plies) for the side to move, or None when the position is not covered."""
+        if len(board) != self.n:
+            return None
+        white, black = count_pieces(board)
+        if white == 0 or black == 0 or white + black > self.max_pieces:
+            return None
+        record = self._find(board_hash(board, player))
+        if record is None:
+            return None
+        self.hits += 1
+        return record[1], record[2]
+
+    def score(self, board, player):
+        """minmax-style score for the side to move (faster wins score higher), or None."""
+        entry = self.probe(board, player)
+        if entry is None:
+            return None
+        result, plies = entry
+        return result * (TB_WIN_SCORE - plies) if result != DRAW else 0
+
+    def best_move(self, board, player):
+        """The move that wins fastest, draws, or loses slowest; None when not covered."""
+        if self.probe(board, player) is None:
+            return None
+        opponent = 'B' if player == 'W' else 'W'
+        best_move, best_score = None, None
+        for move in get_all_valid_moves(board, player):
+            new_board = [row[:] for row in board]
+            make_move_with_multiple_captures(new_board, move, player)
+            if count_pieces(new_board)[0 if opponent == 'W' else 1] == 0:
+                return move
+            score = self.score(new_board, opponent)
+            if score is None:
+                return None
+            if best_score is None or -score > best_score:
+                best_move, best_score = move, -score
+        return best_move
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+_tablebases = {}
+
+def load_tablebase(n, directory=TABLEBASE_DIR):
+    """The tablebase with the most pieces built for board size n, or None."""
+    if (n, directory) not in _tablebases:
+        found = []
+        prefix = f'tb_{n}_'
+        names = os.listdir(directory) if os.path.isdir(directory) else []
+        for name in names:
+            pieces = name[len(prefix):-len('.bin')]
+            if name.startswith(prefix) and name.endswith('.bin') and pieces.isdigit():
+                found.append((int(pieces), os.path.join(directory, name)))
+        tablebase = None
+        for _, path in sorted(found, reverse=True):
+            try:
+                tablebase = Tablebase(path)
+                break
+            except (OSError, ValueError):
+                continue
+        _tablebases[(n, directory)] = tablebase
+    return _tablebases[(n, directory)]
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Build endgame tablebases by retrograde analysis")
+    parser.add_argument('size', type=int, help="board size")
+    parser.add_argument('--pieces', type=int, default=3, help="maximum number of pieces on the board")
+    parser.add_argument('--dir', default=TABLEBASE_DIR)
+    args = parser.parse_args()
+    start = time.time()
+    table = generate(args.size, args.pieces,
+                     lambda done, total: print(f"  {done}/{total} positions expanded", flush=True))
+    path = tablebase_path(args.size, args.pieces, args.dir)
+    write_tablebase(table, args.size, args.pieces, path)
+    wins = sum(1 for result, _ in table.values() if result == WIN)
+    losses = sum(1 for result, _ in table.values() if result == LOSS)
+    print(f"{path}: {len(table)} positions ({wins} wins, {losses} losses, "
+          f"{len(table) - wins - losses} draws) in {time.time() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import math
+import random
+import time
+from checkers import get_all_valid_moves, search_root, MCTSNode, mcts, RaveNode, mcts_rave, evaluate_board, evaluate_game
+from tablebase import TB_WIN_SCORE
+
+MAX_DEPTH = 32
+MCTS_CHUNK = 50  # iterations between clock checks
+
+class SearchTimeout(Exception):
+    pass
+
+def is_decided(score):
+    # A forced win or loss (no moves left, or a tablebase result) - searching deeper changes nothing
+    return math.isinf(score) or abs(score) > TB_WIN_SCORE // 2
+
+class DeadlineEvaluator:
+    # Wraps the leaf evaluation so an iteration running past the hard limit is abandoned
+    def __init__(self, evaluate, deadline, check_every=64):
+        self.evaluate = evaluate
+        self.deadline = deadline
+        self.check_every = check_every
+        self.calls = 0
+        if hasattr(evaluate, 'batch'):
+            self.batch = self._batch
+
+    def _check(self):
+        self.calls += 1
+        if self.calls % self.check_every == 0 and time.time() > self.deadline:
+            raise SearchTimeout()
+
+    def __call__(self, board, player):
+        self._check()
+        return self.evaluate(board, player)
+
+    def _batch(self, boards, player):
+        self._check()
+        return self.evaluate.batch(boards, player)
+
+class TimeManager:
+    """Splits a game clock (total seconds plus increment per move) into per-move budgets.
+
+    The budget grows with the number of legal moves and shrinks as the board empties out.
+    Within a move the search stops early once the best move has been stable for a few
+    iterations, and may run past the soft budget (up to the hard one) while it keeps changing.
+    """
+    def __init__(self, total, increment=0.0, safety=0.05, min_moves_left=10, max_moves_left=40):
+        self.remaining = total
+        self.increment = increment
+        self.safety = safety  # seconds kept back for move overhead
+        self.min_moves_left = min_moves_left
+        self.max_moves_left = max_moves_left
+        self.move_started = None
+
+    def moves_left(self, board):
+        # Fewer pieces on the board - fewer moves expected until the end
+        n = len(board)
+        initial = n * (n // 2 - 1)
+        pieces = sum(1 for row in board for piece in row if piece != ' ')
+        fraction = min(1.0, pieces / initial) if initial else 1.0
+        return self.min_moves_left + (self.max_moves_left - self.min_moves_left) * fraction
+
+    def allocate(self, board, legal_moves):
+        """Returns (soft, hard) budgets in seconds for this move; (0, 0) for a forced move."""
+        if len(legal_moves) <= 1:
+            return 0.0, 0.0
+        available = max(0.0, self.remaining - self.safety)
+        base = available / self.moves_left(board) + 0.8 * self.increment
+        # More choices - more time, within limits
+        complexity = min(1.5, max(0.6, len(legal_moves) / 8))
+        soft = min(base * complexity, available)
+        hard = min(soft * 3, available * 0.25 + self.increment, available)
+        return soft, max(soft, hard)
+
+    def start_move(self):
+        self.move_started = time.time()
+
+    def end_move(self):
+        if self.move_started is not None:
+            self.remaining -= time.time() - self.move_started
+            self.move_started = None
+        self.remaining += self.increment
+
+    @staticmethod
+    def keep_searching(elapsed, next_iteration, soft, hard, stable_iterations):
+        """Decides after each completed iteration whether to start another one."""
+        if stable_iterations >= 3:
+            soft *= 0.6
+        elif stable_iterations == 0:
+            soft *= 1.5
+        # Do not start an iteration that is unlikely to finish before the hard limit
+        return elapsed < min(soft, hard) and elapsed + next_iteration < hard
+
+def remote_timed_move(engine, board, player, ai_type, time_manager, max_depth=MAX_DEPTH, max_iterations=10 ** 7):
+    """timed_move for a remote engine (EngineClient): the soft budget is sent as the search's movetime."""
+    time_manager.start_move()
+    try:
+        legal_moves = get_all_valid_moves(board, player)
+        if len(legal_moves) <= 1:
+            return legal_moves[0] if legal_moves else None
+        soft, hard = time_manager.allocate(board, legal_moves)
+        # The server aborts the search at movetime, so the move costs the soft budget at most (plus the round trip)
+        return engine.ai_move(board, player, ai_type, depth=max_depth, iterations=max_iterations,
+                              movetime=max(1, int(soft * 1000)))
+    finally:
+        time_manager.end_move()
+
+def timed_move(board, player, ai_type, time_manager, evaluate=evaluate_board, evaluate_result=evaluate_game,
+               book=None, tablebase=None, history=None, max_depth=MAX_DEPTH, nodes=None):
+    """Chooses a move within the time manager's budget and charges the time used to its clock.
+    
+    nodes: optional NodePool bounding the MCTS tree of a long think.
+    """
+    time_manager.start_move()
+    try:
+        legal_moves = get_all_valid_moves(board, player)
+        if not legal_moves:
+            return None
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        if book is not None:
+            entry = book.probe(board, player)
+            if entry:
+                return entry[0]
+        if tablebase is not None:
+            move = tablebase.best_move(board, player)
+            if move:
+                return move
+
+        soft, hard = time_manager.allocate(board, legal_moves)
+        start = time.time()
+        best_move = None
+        stable = 0
+
+        if ai_type == 'minmax':
+            # Iterative deepening, whole depths only
+            previous = None
+            guarded = DeadlineEvaluator(evaluate, start + hard)
+            for depth in range(1, max_depth + 1):
+                iteration_start = time.time()
+                try:
+                    move, value = search_root(board, player, depth, guarded, tablebase, history)
+                except SearchTimeout:
+                    # Unfinished depth - keep the previous one's move
+                    break
+                if value == -math.inf and best_move is not None:
+                    # Every move loses at this depth - keep the shallower depth's choice, which holds out longer
+                    break
+                stable = stable + 1 if move == best_move else 0
+                best_move = move
+                if is_decided(value):
+                    break
+                now = time.time()
+                last = now - iteration_start
+                # The next depth costs about as many times more as this one did over the previous
+                growth = max(2.0, last / previous) if previous else 4.0
+                previous = max(last, 1e-6)
+                if not time_manager.keep_searching(now - start, last * growth, soft, hard, stable):
+                    break
+        else:
+            rave = ai_type == 'mcts_rave'
+            root = RaveNode(board, player) if rave else MCTSNode(board, player)
+            search = mcts_rave if rave else mcts
+            while True:
+                iteration_start = time.time()
+                search(root, MCTS_CHUNK, evaluate_result, tablebase, history, nodes=nodes)
+                move = max(root.children, key=lambda c: c.visits).move if root.children else None
+                stable = stable + 1 if move == best_move else 0
+                best_move = move
+                now = time.time()
+                if not time_manager.keep_searching(now - start, now - iteration_start, soft, hard, stable):
+                    break
+        return best_move if best_move is not None else random.choice(legal_moves)
+    finally:
+        time_manager.end_move()
@@ -0,0 +1,132 @@
+import json
+import os
+import time
+import numpy as np
+from checkers import check_for_captures, WEIGHTS_PATH, load_eval_weights
+from evaluation import FEATURES, DEFAULT_WEIGHTS, boards_to_array, feature_arrays
+from selfplay import play
+
+WEIGHTS_FORMAT = 2  # weights per board size
+
+def play_game(n, depth=2, random_plies=6, seed=None, max_plies=300):
+    """One headless self-play game. Returns (quiet positions seen, result for White: 1, 0.5 or 0)."""
+    plies, result = play(n, depth, random_plies, seed, max_plies)
+    # Quiet positions only - a pending capture makes the static eval meaningless
+    positions = [board for board, player, move, score in plies if not check_for_captures(board, player)]
+    return positions, (result + 1) / 2
+
+def _play(args):
+    return play_game(*args)
+
+def generate_positions(n, games, depth=2, workers=None, seed=0):
+    """Self-play dataset: (boards as an int8 array, result for White per position)."""
+    jobs = [(n, depth, 6, seed + i) for i in range(games)]
+    if workers == 1:
+        finished = [_play(job) for job in jobs]
+    else:
+        from multiprocessing import Pool
+        with Pool(workers) as pool:
+            finished = pool.map(_play, jobs)
+    boards, results = [], []
+    for positions, result in finished:
+        boards.extend(positions)
+        results.extend([result] * len(positions))
+    return boards_to_array(boards), np.array(results)
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+def texel_loss(features, results, weights, k):
+    return float(np.mean((results - sigmoid(k * (features @ weights))) ** 2))
+
+def fit_scale(features, results, weights):
+    # The K that best maps the current scores to results, before the weights move
+    candidates = np.logspace(-2, 1, 61)
+    losses = [texel_loss(features, results, weights, k) for k in candidates]
+    return float(candidates[int(np.argmin(losses))])
+
+def tune_weights(features, results, weights, k, epochs=200, batch_size=4096, learning_rate=0.01, seed=0):
+    """Texel tuning: minimise the squared error between results and sigmoid(k * score), with Adam on mini-batches."""
+    rng = np.random.default_rng(seed)
+    weights = weights.astype(np.float64).copy()
+    m = np.zeros_like(weights)
+    v = np.zeros_like(weights)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    step = 0
+    size = len(results)
+    for _ in range(epochs):
+        order = rng.permutation(size)
+        for start in range(0, size, batch_size):
+            batch = order[start:start + batch_size]
+            f, r = features[batch], results[batch]
+            p = sigmoid(k * (f @ weights))
+            gradient = (-2 * k * ((r - p) * p * (1 - p))) @ f / len(batch)
+            step += 1
+            m = beta1 * m + (1 - beta1) * gradient
+            v = beta2 * v + (1 - beta2) * gradient ** 2
+            weights -= learning_rate * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + eps)
+    return weights
+
+def write_weights(weights, n, path=WEIGHTS_PATH, **info):
+    """Stores the weights for n x n boards in the file read by evaluate_board and the PST evaluator.
+
+    Weights of other board sizes are kept; the file's version goes up by one each time.
+    """
+    data = {}
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        pass
+    if not isinstance(data, dict):
+        data = {}
+    # A format 1 file holds the weights of a single board size
+    sizes = data.get('sizes') or ({str(data['board_size']): data} if 'board_size' in data else {})
+    version = int(data.get('version', 0)) + 1
+    created = time.strftime('%Y-%m-%dT%H:%M:%S')
+    sizes[str(n)] = {
+        'version': version,
+        'created': created,
+        'weights': {name: round(float(value), 6) for name, value in weights.items()},
+        **info,
+    }
+    data = {'format': WEIGHTS_FORMAT, 'version': version, 'created': created, 'sizes': sizes}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+    return version
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Tune evaluation weights from self-play (Texel method)")
+    parser.add_argument('--size', type=int, default=8)
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--depth', type=int, default=2, help="minmax depth of the self-play games")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--epochs', type=int, default=200)
+    parser.add_argument('--out', default=WEIGHTS_PATH)
+    args = parser.parse_args()
+
+    start = time.time()
+    arrays, results = generate_positions(args.size, args.games, args.depth, args.workers)
+    print(f"{len(results)} positions from {args.games} games in {time.time() - start:.1f}s")
+
+    features = feature_arrays(arrays)
+    initial = {**DEFAULT_WEIGHTS, **(load_eval_weights(args.size, args.out) or {})}
+    weights = np.array([initial[name] for name in FEATURES])
+    k = fit_scale(features, results, weights)
+    before = texel_loss(features, results, weights, k)
+    weights = tune_weights(features, results, weights, k, args.epochs)
+    after = texel_loss(features, results, weights, k)
+    print(f"K={k:.4f} loss {before:.5f} -> {after:.5f}")
+
+    tuned = dict(zip(FEATURES, weights))
+    version = write_weights(tuned, args.size, args.out, games=args.games, positions=len(results),
+                            k=k, loss=after)
+    for name, value in tuned.items():
+        print(f"  {name:12s} {value:8.4f}")
+    print(f"wrote {args.out} (version {version})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import pytest
+from book import HEADER, RECORD, OpeningBook, build_book, load_book, opening_positions
+from checkers import initialize_board, search_root
+
+@pytest.fixture(scope='module')
+def book_file(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('books') / 'book_6.bin')
+    build_book(6, plies=2, depth=2, workers=1, path=path)
+    return path
+
+def test_round_trip(book_file):
+    book = OpeningBook(book_file)
+    try:
+        positions = opening_positions(6, 2)
+        assert book.n == 6
+        assert book.count == len(positions)
+        for board, player in positions:
+            move, score = search_root(board, player, 2)
+            assert book.probe(board, player) == (move, round(score * 100) / 100)
+    finally:
+        book.close()
+
+def test_records_sorted_by_hash(book_file):
+    with open(book_file, 'rb') as f:
+        data = f.read()
+    hashes = [RECORD.unpack_from(data, HEADER.size + i * RECORD.size)[0]
+              for i in range((len(data) - HEADER.size) // RECORD.size)]
+    assert hashes == sorted(hashes)
+
+def test_unknown_position_and_other_size(book_file):
+    book = OpeningBook(book_file)
+    try:
+        board = initialize_board(6)
+        # Black to move in the start position never occurs in a game
+        assert book.probe(board, 'B') is None
+        assert book.probe(initialize_board(8), 'W') is None
+    finally:
+        book.close()
+
+def test_truncated_file_is_rejected(book_file, tmp_path):
+    with open(book_file, 'rb') as f:
+        data = f.read()
+    path = tmp_path / 'truncated.bin'
+    path.write_bytes(data[:-1])
+    with pytest.raises(ValueError):
+        OpeningBook(str(path))
+
+def test_wrong_magic_is_rejected(book_file, tmp_path):
+    with open(book_file, 'rb') as f:
+        data = f.read()
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'XXXX' + data[4:])
+    with pytest.raises(ValueError):
+        OpeningBook(str(path))
+
+def test_load_book_without_a_file(tmp_path):
+    assert load_book(6, str(tmp_path)) is None
@@ -0,0 +1,85 @@
+import pytest
+from cache import EvalCache, CachedEvaluator, cached
+from checkers import initialize_board, get_all_valid_moves, make_move_with_multiple_captures
+
+def test_evicts_least_recently_used():
+    cache = EvalCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    # Reading 'a' makes 'b' the oldest entry
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.evictions == 1
+    assert len(cache) == 2
+
+def test_put_of_existing_key_refreshes_it():
+    cache = EvalCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 1)
+    cache.put('c', 3)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+def test_byte_bound():
+    cache = EvalCache(max_entries=None, max_bytes=1000)
+    for i in range(100):
+        cache.put((i, 'W'), float(i))
+    assert cache.size_bytes <= 1000
+    assert 0 < len(cache) < 100
+    # The newest entries are the ones kept
+    assert cache.get((99, 'W')) == 99.0
+    assert cache.get((0, 'W')) is None
+
+def test_hit_rate():
+    cache = EvalCache()
+    cache.put('a', 1)
+    cache.get('a')
+    cache.get('b')
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    assert cache.hit_rate() == 0.5
+
+def test_needs_a_bound():
+    with pytest.raises(ValueError):
+        EvalCache(max_entries=None, max_bytes=None)
+
+class CountingEvaluator:
+    def __init__(self):
+        self.calls = 0
+        self.batched = 0
+
+    def __call__(self, board, player):
+        self.calls += 1
+        return float(sum(row.count('W') - row.count('B') for row in board)) * (1 if player == 'W' else -1)
+
+    def batch(self, boards, player):
+        self.batched += len(boards)
+        return [self(board, player) for board in boards]
+
+def test_cached_evaluator_evaluates_each_position_once():
+    evaluate = CountingEvaluator()
+    wrapped = CachedEvaluator(evaluate)
+    board = initialize_board(6)
+    assert wrapped(board, 'W') == wrapped(board, 'W') == evaluate(board, 'W')
+    assert evaluate.calls == 2
+    # Same board, other side to move - a different key
+    wrapped(board, 'B')
+    assert evaluate.calls == 3
+
+def test_cached_batch_only_sends_misses():
+    evaluate = CountingEvaluator()
+    wrapped = cached(evaluate)
+    board = initialize_board(6)
+    children = []
+    for move in get_all_valid_moves(board, 'W'):
+        child = [row[:] for row in board]
+        make_move_with_multiple_captures(child, move, 'W')
+        children.append(child)
+    wrapped(children[0], 'W')
+    scores = wrapped.batch(children, 'W')
+    assert scores == [evaluate(child, 'W') for child in children]
+    assert evaluate.batched == len(children) - 1
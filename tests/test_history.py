@@ -0,0 +1,84 @@
+from checkers import get_all_valid_moves, search_root
+from hashing import board_hash
+from history import PositionHistory, is_progress
+
+def kings_board():
+    board = [[' '] * 6 for _ in range(6)]
+    board[0][0] = 'WK'
+    board[5][1] = 'BK'
+    return board
+
+# Both kings step out and back: after each cycle the start position is on the board again
+CYCLE = [((0, 0, 1, 1), 'W'), ((5, 1, 4, 0), 'B'), ((1, 1, 0, 0), 'W'), ((4, 0, 5, 1), 'B')]
+
+def play(history, board, moves):
+    for move, player in moves:
+        assert move in get_all_valid_moves(board, player)
+        history.make_move(board, move, player)
+
+def test_threefold_repetition():
+    board = kings_board()
+    history = PositionHistory(board, 'W')
+    play(history, board, CYCLE)
+    assert history.count() == 2
+    assert not history.is_draw()
+    assert history.is_draw(repetitions=2)
+    play(history, board, CYCLE)
+    assert history.count() == 3
+    assert history.is_draw()
+
+def test_no_progress_rule():
+    board = kings_board()
+    history = PositionHistory(board, 'W', repetitions=100, no_progress_limit=8)
+    play(history, board, CYCLE)
+    assert not history.is_draw()
+    play(history, board, CYCLE)
+    assert history.quiet == 8
+    assert history.is_draw()
+
+def test_man_move_and_capture_are_progress():
+    board = [[' '] * 6 for _ in range(6)]
+    board[1][1] = 'W'
+    board[2][2] = 'WK'
+    board[3][3] = 'B'
+    assert is_progress(board, (1, 1, 2, 0))
+    assert is_progress(board, (2, 2, 4, 4))
+    assert not is_progress(board, (2, 2, 3, 1))
+
+def test_progress_resets_the_count():
+    board = kings_board()
+    board[1][3] = 'W'
+    history = PositionHistory(board, 'W')
+    play(history, board, CYCLE[:2])
+    assert history.quiet == 2
+    play(history, board, [((1, 3, 2, 4), 'W')])
+    assert history.quiet == 0
+
+def test_incremental_hash_matches_a_full_hash():
+    board = [[' '] * 6 for _ in range(6)]
+    board[2][2] = 'W'
+    board[3][3] = 'B'
+    board[5][3] = 'B'
+    history = PositionHistory(board, 'W')
+    # A capture that lands next to another black man
+    play(history, board, [((2, 2, 4, 4), 'W')])
+    assert board[3][3] == ' '
+    assert history.hash == board_hash(board, 'B')
+
+def test_pop_restores_the_previous_position():
+    board = kings_board()
+    history = PositionHistory(board, 'W')
+    start = (history.hash, history.quiet, dict(history.counts))
+    play(history, board, CYCLE[:1])
+    history.pop()
+    assert (history.hash, history.quiet, history.counts) == start
+
+def test_search_scores_a_repetition_as_a_draw():
+    board = kings_board()
+    board[0][4] = 'W'
+    history = PositionHistory(board, 'W')
+    play(history, board, CYCLE[:3])
+    # Black is a man down; going back to (5, 1) repeats the start position, which the search scores 0
+    move, score = search_root(board, 'B', 1, history=history)
+    assert (move, score) == ((4, 0, 5, 1), 0)
+    assert len(history.stack) == 3
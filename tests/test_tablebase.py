@@ -0,0 +1,102 @@
+import pytest
+from checkers import get_all_valid_moves, make_move_with_multiple_captures
+from hashing import board_hash
+from tablebase import (WIN, DRAW, LOSS, TB_WIN_SCORE, Tablebase, count_pieces, enumerate_positions, generate,
+                       load_tablebase, write_tablebase)
+
+@pytest.fixture(scope='module', params=[(4, 3), (6, 3)], ids=['4x4-3', '6x6-3'])
+def table(request):
+    n, max_pieces = request.param
+    return n, max_pieces, generate(n, max_pieces)
+
+def expected_entry(board, player, table):
+    # One step of the retrograde recurrence, from the stored results of the successors
+    opponent = 'B' if player == 'W' else 'W'
+    moves = get_all_valid_moves(board, player)
+    if not moves:
+        return LOSS, 0
+    wins, losses, draw = [], [], False
+    for move in moves:
+        new_board = [row[:] for row in board]
+        make_move_with_multiple_captures(new_board, move, player)
+        if count_pieces(new_board)[0 if opponent == 'W' else 1] == 0:
+            wins.append(1)
+            continue
+        result, plies = table[board_hash(new_board, opponent)]
+        if result == LOSS:
+            wins.append(plies + 1)
+        elif result == WIN:
+            losses.append(plies + 1)
+        else:
+            draw = True
+    if wins:
+        return WIN, min(wins)
+    if draw:
+        return DRAW, 0
+    return LOSS, max(losses)
+
+def test_results_follow_the_recurrence(table):
+    n, max_pieces, results = table
+    wrong = []
+    for board, player in enumerate_positions(n, max_pieces):
+        entry = results[board_hash(board, player)]
+        if entry != expected_entry(board, player, results):
+            wrong.append((board, player, entry))
+    assert not wrong
+
+def test_round_trip(table, tmp_path):
+    n, max_pieces, results = table
+    path = str(tmp_path / f'tb_{n}_{max_pieces}.bin')
+    write_tablebase(results, n, max_pieces, path)
+    tablebase = Tablebase(path)
+    try:
+        assert (tablebase.n, tablebase.max_pieces, tablebase.count) == (n, max_pieces, len(results))
+        for board, player in enumerate_positions(n, max_pieces):
+            result, plies = results[board_hash(board, player)]
+            assert tablebase.probe(board, player) == (result, plies)
+            assert tablebase.score(board, player) == (0 if result == DRAW else result * (TB_WIN_SCORE - plies))
+    finally:
+        tablebase.close()
+
+def test_best_move_keeps_the_result(table, tmp_path):
+    n, max_pieces, results = table
+    path = str(tmp_path / f'tb_{n}_{max_pieces}.bin')
+    write_tablebase(results, n, max_pieces, path)
+    tablebase = Tablebase(path)
+    try:
+        for board, player in enumerate_positions(n, max_pieces):
+            result, plies = results[board_hash(board, player)]
+            if result != WIN:
+                continue
+            move = tablebase.best_move(board, player)
+            new_board = [row[:] for row in board]
+            make_move_with_multiple_captures(new_board, move, player)
+            opponent = 'B' if player == 'W' else 'W'
+            if count_pieces(new_board)[0 if opponent == 'W' else 1]:
+                # The winner's move leaves the opponent lost, one ply closer to the end
+                assert tablebase.probe(new_board, opponent) == (LOSS, plies - 1)
+    finally:
+        tablebase.close()
+
+def test_positions_outside_the_table(tmp_path):
+    results = generate(4, 2)
+    path = str(tmp_path / 'tb_4_2.bin')
+    write_tablebase(results, 4, 2, path)
+    tablebase = Tablebase(path)
+    try:
+        board = [[' '] * 4 for _ in range(4)]
+        board[0][0], board[0][2], board[3][1] = 'W', 'W', 'B'
+        assert tablebase.probe(board, 'W') is None
+        assert tablebase.probe([[' '] * 6 for _ in range(6)], 'W') is None
+    finally:
+        tablebase.close()
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = tmp_path / 'tb_4_2.bin'
+    write_tablebase(generate(4, 2), 4, 2, str(path))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        Tablebase(str(path))
+
+def test_load_tablebase_without_a_file(tmp_path):
+    assert load_tablebase(4, str(tmp_path)) is None